@@ -8,6 +8,7 @@ from typing import Optional, Annotated
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, File, UploadFile, Depends, HTTPException, status, Header, Query
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session as SQLSession
 
@@ -811,8 +812,10 @@ async def upload_file(
         tmp_path = tmp.name
 
     try:
-        # Process file and add to vector store
-        result = VectorDBService.add_documents_to_session(
+        # Process file and add to vector store; parsing and embedding block,
+        # so run them off the event loop to keep concurrent uploads moving
+        result = await run_in_threadpool(
+            VectorDBService.add_documents_to_session,
             session_id,
             user_id,
             tmp_path,
@@ -9,6 +9,7 @@ from models import AuthSession
 # Configuration
 SESSION_EXPIRE_MINUTES = int(os.getenv("SESSION_EXPIRE_MINUTES", 60 * 24))  # 24 hours default
 MAX_PASSWORD_LENGTH = 72
+DEFAULT_BCRYPT_ROUNDS = 12
 
 
 class AuthService:
@@ -18,7 +19,9 @@ class AuthService:
         if len(password.encode('utf-8')) > MAX_PASSWORD_LENGTH:
             raise ValueError("Password is too long")
         
-        salt = bcrypt.gensalt()
+        # Read per call so test runs can lower the cost factor via the environment
+        rounds = int(os.getenv("BCRYPT_ROUNDS", DEFAULT_BCRYPT_ROUNDS))
+        salt = bcrypt.gensalt(rounds=rounds)
         hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
         return hashed.decode('utf-8')
 
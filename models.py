@@ -30,7 +30,11 @@ class User(Base):
 
     # Relationships
     sessions = relationship("Session", back_populates="user", cascade="all, delete-orphan")
-    auth_sessions = relationship("AuthSession", back_populates="user", cascade="all, delete-orphan")
+    # auth_sessions.user_id cascades in the database, so deleting a user
+    # does not need to load its tokens first
+    auth_sessions = relationship(
+        "AuthSession", back_populates="user", cascade="all, delete-orphan", passive_deletes=True
+    )
 
     def __repr__(self):
         return f"<User(id={self.id}, email={self.email})>"
@@ -49,7 +53,7 @@ class Session(Base):
     __table_args__ = (Index("ix_sessions_user_status", "user_id", "status"),)
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id = Column(String(36), ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(String(36), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     status = Column(
         Enum(SessionStatus),
         default=SessionStatus.ACTIVE,
@@ -89,7 +93,7 @@ class Document(Base):
     __table_args__ = (Index("ix_documents_session", "session_id"),)
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    session_id = Column(String(36), ForeignKey("sessions.id"), nullable=False, index=True)
+    session_id = Column(String(36), ForeignKey("sessions.id", ondelete="CASCADE"), nullable=False, index=True)
     file_name = Column(String(255), nullable=False)
     file_size = Column(Integer, nullable=False)  # Bytes
     file_type = Column(String(50), nullable=False)  # pdf, docx, txt, etc.
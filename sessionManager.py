@@ -1,6 +1,7 @@
 import logging
 from typing import Optional, List
 from datetime import datetime, timezone
+from sqlalchemy import func, update
 from sqlalchemy.orm import Session as SQLSession
 from models import Session, User, Document
 from session_lifecycle import SessionLifecycle, SessionState
@@ -12,17 +13,15 @@ class SessionManager:
 
     @staticmethod
     def _archive_other_active_sessions(user_id: str, db: SQLSession, except_session_id: Optional[str] = None):
-        query = db.query(Session).filter(
-            Session.user_id == user_id, 
-            Session.status == SessionState.ACTIVE
-        )
+        # One UPDATE however many sessions are active; the caller commits it
+        # together with the session it is activating
+        criteria = [Session.user_id == user_id]
         if except_session_id:
-            query = query.filter(Session.id != except_session_id)
-            
-        active_sessions = query.all()
-        for session in active_sessions:
-            logger.info(f"Auto-archiving session {session.id} because a new session became active.")
-            SessionLifecycle.transition(session, SessionState.ARCHIVED, db, None)
+            criteria.append(Session.id != except_session_id)
+
+        archived = SessionLifecycle.bulk_archive(db, *criteria)
+        if archived:
+            logger.info(f"Auto-archived {archived} session(s) of user {user_id} because a new session became active.")
 
     @staticmethod
     def create_session(
@@ -33,7 +32,7 @@ class SessionManager:
     ) -> Session:
 
         # Verify user exists
-        user = db.query(User).filter(User.id == user_id).first()
+        user = db.get(User, user_id)
         if not user:
             raise ValueError(f"User {user_id} not found")
 
@@ -57,11 +56,10 @@ class SessionManager:
     @staticmethod
     def get_session(session_id: str, user_id: str, db: SQLSession) -> Optional[Session]:
 
-        session = (
-            db.query(Session)
-            .filter(Session.id == session_id, Session.user_id == user_id)
-            .first()
-        )
+        # Primary-key lookup hits the identity map before issuing a SELECT
+        session = db.get(Session, session_id)
+        if session is None or session.user_id != user_id:
+            return None
         return session
 
     @staticmethod
@@ -140,6 +138,20 @@ class SessionManager:
 
         return sessions
 
+    @staticmethod
+    def count_sessions(
+        user_id: str,
+        db: SQLSession,
+        status: Optional[SessionState] = None,
+    ) -> int:
+
+        query = db.query(func.count(Session.id)).filter(Session.user_id == user_id)
+
+        if status:
+            query = query.filter(Session.status == status)
+
+        return query.scalar()
+
     @staticmethod
     def get_session_documents(
         session_id: str, user_id: str, db: SQLSession
@@ -186,11 +198,14 @@ class SessionManager:
 
     @staticmethod
     def update_session_timestamp(session_id: str, user_id: str, db: SQLSession):
- 
-        session = SessionManager.get_session(session_id, user_id, db)
-        if session:
-            session.updated_at = datetime.now(timezone.utc)
-            db.commit()
+
+        # Single UPDATE scoped to the owner; a loaded instance is kept in sync
+        db.execute(
+            update(Session)
+            .where(Session.id == session_id, Session.user_id == user_id)
+            .values(updated_at=datetime.now(timezone.utc))
+        )
+        db.commit()
 
     @staticmethod
     def archive_session(
@@ -3,9 +3,10 @@
 from enum import Enum
 from datetime import datetime, timezone, timedelta
 from typing import Optional
+from sqlalchemy import delete, select, update
 from sqlalchemy.orm import Session as SQLSession
 import logging
-from models import Session
+from models import Document, Session
 
 logger = logging.getLogger(__name__)
 
@@ -19,11 +20,11 @@ class SessionState(str, Enum):
 
 class SessionLifecycle:
 
-    # Define valid state transitions
+    # Define valid state transitions (frozensets for constant-time membership)
     VALID_TRANSITIONS = {
-        SessionState.ACTIVE: [SessionState.ARCHIVED, SessionState.DELETED],
-        SessionState.ARCHIVED: [SessionState.ACTIVE, SessionState.DELETED],
-        SessionState.DELETED: [],  # Terminal state
+        SessionState.ACTIVE: frozenset({SessionState.ARCHIVED, SessionState.DELETED}),
+        SessionState.ARCHIVED: frozenset({SessionState.ACTIVE, SessionState.DELETED}),
+        SessionState.DELETED: frozenset(),  # Terminal state
     }
 
     @staticmethod
@@ -32,7 +33,7 @@ class SessionLifecycle:
     ) -> bool:
         """Check if transition is allowed."""
         return target_state in SessionLifecycle.VALID_TRANSITIONS.get(
-            current_state, []
+            current_state, frozenset()
         )
 
     @staticmethod
@@ -67,6 +68,23 @@ class SessionLifecycle:
         logger.info(f"Session {session.id} archived")
         return True
 
+    @staticmethod
+    def bulk_archive(db: SQLSession, *criteria, now: Optional[datetime] = None) -> int:
+        """Archive every ACTIVE session matching criteria in one UPDATE.
+
+        The set-based counterpart of _archive; the caller commits.
+        Returns the number of sessions archived.
+        """
+        result = db.execute(
+            update(Session)
+            .where(Session.status == SessionState.ACTIVE, *criteria)
+            .values(
+                status=SessionState.ARCHIVED,
+                archived_at=now or datetime.now(timezone.utc),
+            )
+        )
+        return result.rowcount
+
     @staticmethod
     def _reactivate(session, db: SQLSession) -> bool:
         session.status = SessionState.ACTIVE
@@ -83,10 +101,12 @@ class SessionLifecycle:
         except Exception as e:
             logger.warning(f"Could not delete Chroma collection: {e}")
 
-        # Delete documents (cascades via SQLAlchemy)
-        session.status = SessionState.DELETED
-        db.delete(session)
+        # Two statements regardless of document count; documents are deleted
+        # explicitly since older databases lack ON DELETE CASCADE on them
+        db.execute(delete(Document).where(Document.session_id == session.id))
+        db.execute(delete(Session).where(Session.id == session.id))
         db.commit()
+        session.status = SessionState.DELETED
         logger.info(f"Session {session.id} permanently deleted")
         return True
 
@@ -96,6 +116,8 @@ class ArchivalPolicy:
     # Configuration (can be overridden via environment variables)
     INACTIVITY_DAYS = int(__import__("os").getenv("SESSION_INACTIVITY_DAYS", 30))
     RETENTION_DAYS = int(__import__("os").getenv("SESSION_RETENTION_DAYS", 90))
+    INACTIVITY_DELTA = timedelta(days=INACTIVITY_DAYS)
+    RETENTION_DELTA = timedelta(days=RETENTION_DAYS)
 
     @staticmethod
     def should_auto_archive(session) -> bool:
@@ -106,11 +128,7 @@ class ArchivalPolicy:
         if updated_at.tzinfo is None:
             updated_at = updated_at.replace(tzinfo=timezone.utc)
 
-        days_since_update = (
-            datetime.now(timezone.utc) - updated_at
-        ).days
-
-        return days_since_update >= ArchivalPolicy.INACTIVITY_DAYS
+        return datetime.now(timezone.utc) - updated_at >= ArchivalPolicy.INACTIVITY_DELTA
 
     @staticmethod
     def should_hard_delete(session) -> bool:
@@ -121,53 +139,59 @@ class ArchivalPolicy:
         if archived_at.tzinfo is None:
             archived_at = archived_at.replace(tzinfo=timezone.utc)
 
-        days_since_archival = (
-            datetime.now(timezone.utc) - archived_at
-        ).days
-
-        return days_since_archival >= ArchivalPolicy.RETENTION_DAYS
+        return datetime.now(timezone.utc) - archived_at >= ArchivalPolicy.RETENTION_DELTA
 
     @staticmethod
     def cleanup_job(db: SQLSession, vectordb_service):
 
 
         logger.info("Running session archival cleanup job")
+        now = datetime.now(timezone.utc)
 
-        # Auto-archive inactive active sessions
-        inactive_sessions = (
-            db.query(Session)
-            .filter(Session.status == SessionState.ACTIVE)
-            .all()
-        )
-
-        archived_count = 0
-        for session in inactive_sessions:
-            if ArchivalPolicy.should_auto_archive(session):
-                try:
-                    SessionLifecycle.transition(
-                        session, SessionState.ARCHIVED, db, vectordb_service
-                    )
-                    archived_count += 1
-                except Exception as e:
-                    logger.error(f"Error archiving session {session.id}: {e}")
-
-        # Hard delete old archived sessions
-        archived_sessions = (
-            db.query(Session)
-            .filter(Session.status == SessionState.ARCHIVED)
-            .all()
+        # Auto-archive inactive active sessions in a single UPDATE
+        inactivity_cutoff = now - ArchivalPolicy.INACTIVITY_DELTA
+        try:
+            archived_count = SessionLifecycle.bulk_archive(
+                db, Session.updated_at <= inactivity_cutoff, now=now
+            )
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            archived_count = 0
+            logger.error(f"Error auto-archiving inactive sessions: {e}")
+
+        # Hard delete old archived sessions with bulk statements. Documents
+        # are deleted explicitly because databases created before
+        # documents.session_id gained ON DELETE CASCADE do not cascade it.
+        # There is no separate SELECT: the documents DELETE takes SQLite's
+        # write lock, so the sessions DELETE matches the same rows and its
+        # RETURNING list is exactly what the Chroma cleanup below walks
+        retention_cutoff = now - ArchivalPolicy.RETENTION_DELTA
+        expired_criteria = (
+            Session.status == SessionState.ARCHIVED,
+            Session.archived_at <= retention_cutoff,
         )
-
-        deleted_count = 0
-        for session in archived_sessions:
-            if ArchivalPolicy.should_hard_delete(session):
-                try:
-                    SessionLifecycle.transition(
-                        session, SessionState.DELETED, db, vectordb_service
-                    )
-                    deleted_count += 1
-                except Exception as e:
-                    logger.error(f"Error hard-deleting session {session.id}: {e}")
+        expired_ids = select(Session.id).where(*expired_criteria).scalar_subquery()
+        try:
+            db.execute(delete(Document).where(Document.session_id.in_(expired_ids)))
+            expired = db.execute(
+                delete(Session)
+                .where(*expired_criteria)
+                .returning(Session.id, Session.user_id)
+            ).all()
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            expired = []
+            logger.error(f"Error hard-deleting archived sessions: {e}")
+
+        # Chroma collections are only dropped once their rows are gone
+        for row in expired:
+            try:
+                vectordb_service.delete_session_collection(row.id, row.user_id)
+            except Exception as e:
+                logger.warning(f"Could not delete Chroma collection for {row.id}: {e}")
+        deleted_count = len(expired)
 
         logger.info(
             f"Cleanup job completed: {archived_count} archived, {deleted_count} deleted"
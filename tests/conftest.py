@@ -3,17 +3,35 @@ Shared pytest fixtures and configuration for PDFChat tests.
 """
 import os
 import tempfile
-from datetime import datetime, timedelta
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
 from unittest.mock import MagicMock, patch
 
 import pytest
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy import bindparam, create_engine, event, insert
+from sqlalchemy.orm import Session, raiseload
 from sqlalchemy.pool import StaticPool
 
-from models import Base, User, Session as SessionModel, AuthSession
+from models import Base, User, Session as SessionModel, AuthSession, SessionStatus
 from auth_service import AuthService
 from database import get_db
+from tests.fixtures.factories import persist
+
+
+def pytest_configure(config):
+    """Use the minimum bcrypt cost factor; production defaults to 12."""
+    os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip production-cost bcrypt tests unless RUN_KDF is set (CI sets it)."""
+    if os.environ.get("RUN_KDF"):
+        return
+    skip_kdf = pytest.mark.skip(reason="set RUN_KDF=1 to run production-cost bcrypt tests")
+    for item in items:
+        if "slow_kdf" in item.keywords:
+            item.add_marker(skip_kdf)
 
 
 @pytest.fixture(autouse=True)
@@ -25,33 +43,108 @@ def mock_env_vars():
 
 @pytest.fixture(scope="session")
 def test_db():
-    """Create an in-memory SQLite database for testing."""
+    """Create an in-memory SQLite database for testing.
+
+    The schema is created once per test session; ``db_session`` isolates
+    individual tests with a rolled-back transaction instead of re-running DDL.
+    """
     engine = create_engine(
         "sqlite:///:memory:",
         connect_args={"check_same_thread": False},
         poolclass=StaticPool,
     )
-    
-    # Enable foreign keys for SQLite
-    from sqlalchemy import event
+
     @event.listens_for(engine, "connect")
     def set_sqlite_pragma(dbapi_connection, connection_record):
+        # Let SQLAlchemy emit BEGIN itself so SAVEPOINTs behave under pysqlite
+        dbapi_connection.isolation_level = None
+        # Enable foreign keys for SQLite
         cursor = dbapi_connection.cursor()
         cursor.execute("PRAGMA foreign_keys=ON")
         cursor.close()
 
+    @event.listens_for(engine, "begin")
+    def do_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
     Base.metadata.create_all(engine)
     return engine
 
 
 @pytest.fixture
 def db_session(test_db):
-    """Create a new database session for each test."""
-    SessionLocal = sessionmaker(bind=test_db)
-    session = SessionLocal()
+    """Create a new database session for each test.
+
+    The session is joined to an outer transaction that is rolled back on
+    teardown; ``commit()`` calls made by the code under test only release
+    a SAVEPOINT, so nothing persists between tests.
+    """
+    connection = test_db.connect()
+    transaction = connection.begin()
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
     yield session
-    session.rollback()
     session.close()
+    transaction.rollback()
+    connection.close()
+
+
+_SAVEPOINT_STATEMENTS = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+
+
+@pytest.fixture
+def strict_loading(db_session):
+    """Make any lazy relationship load on db_session raise.
+
+    Adds ``raiseload("*")`` to every ORM SELECT, so tests must request the
+    relationships they touch with explicit loader options.
+    """
+    def _add_raiseload(execute_state):
+        if execute_state.is_select:
+            execute_state.statement = execute_state.statement.options(raiseload("*"))
+
+    event.listen(db_session, "do_orm_execute", _add_raiseload)
+    yield db_session
+    event.remove(db_session, "do_orm_execute", _add_raiseload)
+
+
+@pytest.fixture
+def count_queries(db_session):
+    """Return a context manager collecting the SQL statements db_session runs.
+
+    SAVEPOINT bookkeeping from the ``db_session`` isolation is not counted.
+    """
+    connection = db_session.connection()
+
+    @contextmanager
+    def _count():
+        statements = []
+
+        def _record(conn, cursor, statement, parameters, context, executemany):
+            if not statement.startswith(_SAVEPOINT_STATEMENTS):
+                statements.append(statement)
+
+        event.listen(connection, "before_cursor_execute", _record)
+        try:
+            yield statements
+        finally:
+            event.remove(connection, "before_cursor_execute", _record)
+
+    return _count
+
+
+@pytest.fixture
+def assert_max_queries(count_queries):
+    """Return a context manager failing the test if it runs more than ``limit`` statements."""
+    @contextmanager
+    def _assert_max(limit):
+        with count_queries() as statements:
+            yield statements
+        assert len(statements) <= limit, (
+            f"expected at most {limit} queries, got {len(statements)}:\n"
+            + "\n".join(statements)
+        )
+
+    return _assert_max
 
 
 @pytest.fixture
@@ -75,12 +168,27 @@ def client(app_with_db):
     return TestClient(app_with_db)
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def auth_service():
     """Provide AuthService instance."""
     return AuthService()
 
 
+@pytest.fixture
+def fast_hash(monkeypatch):
+    """Stub out bcrypt for tests that only need a user row to exist.
+
+    Hashing and verification stay consistent with each other, so login
+    flows still work; TestAuthServicePasswordHashing keeps real bcrypt.
+    """
+    monkeypatch.setattr(
+        AuthService, "hash_password", staticmethod(lambda p: "$2b$stub$" + p)
+    )
+    monkeypatch.setattr(
+        AuthService, "verify_password", staticmethod(lambda p, h: h == "$2b$stub$" + p)
+    )
+
+
 @pytest.fixture
 def test_user(db_session, auth_service):
     """Create a test user in the database."""
@@ -88,10 +196,7 @@ def test_user(db_session, auth_service):
     password = "TestPassword123!"
     hashed_password = auth_service.hash_password(password)
 
-    user = User(email=email, hashed_password=hashed_password)
-    db_session.add(user)
-    db_session.commit()
-    db_session.refresh(user)
+    user = persist(db_session, User(email=email, hashed_password=hashed_password))
 
     return {"user": user, "password": password, "email": email}
 
@@ -102,13 +207,11 @@ def test_session_data(db_session, test_user):
     session = SessionModel(
         user_id=test_user["user"].id,
         title="Test Session",
-        status="ACTIVE",
+        # Use the enum, as a row loaded from the database would hold
+        status=SessionStatus.ACTIVE,
         metadata_={"test": True},
     )
-    db_session.add(session)
-    db_session.commit()
-    db_session.refresh(session)
-    return session
+    return persist(db_session, session)
 
 
 @pytest.fixture
@@ -121,22 +224,30 @@ def valid_auth_token(test_user, auth_service, db_session):
     )
 
 
+# Fixed-shape insert reused by expired_auth_token; skips the ORM unit of work
+_EXPIRED_SESSION_INSERT = insert(AuthSession).values(
+    token=bindparam("token"),
+    user_id=bindparam("user_id"),
+    expires_at=bindparam("expires_at"),
+)
+
+
 @pytest.fixture
 def expired_auth_token(db_session, test_user):
-    """Create an expired session token for testing."""
-    from models import AuthSession
-    from datetime import datetime, timedelta, timezone
-    import uuid
-    
+    """Create an expired session token for testing.
+
+    The row is written inside the test transaction rather than committed,
+    so no COMMIT is issued just to set up the test.
+    """
     token = f"expired_token_{uuid.uuid4()}"
-    auth_session = AuthSession(
-        token=token,
-        user_id=test_user["user"].id,
-        chat_session_id=None,
-        expires_at=datetime.now(timezone.utc) - timedelta(hours=1)
+    db_session.execute(
+        _EXPIRED_SESSION_INSERT,
+        {
+            "token": token,
+            "user_id": test_user["user"].id,
+            "expires_at": datetime.now(timezone.utc) - timedelta(hours=1),
+        },
     )
-    db_session.add(auth_session)
-    db_session.commit()
     return token
 
 
@@ -169,6 +280,12 @@ def mock_chroma():
         yield mock_chroma_store
 
 
+@pytest.fixture
+def mock_vectordb():
+    """Stand-in for VectorDBService limited to the method lifecycle code calls."""
+    return MagicMock(spec=["delete_session_collection"])
+
+
 @pytest.fixture
 def mock_checkpointer():
     """Mock LangGraph SqliteSaver checkpointer."""
@@ -222,13 +339,18 @@ def test_txt_content():
 
 
 @pytest.fixture
-def mock_pdf_loader(test_pdf_content):
-    """Mock PyPDF2 PDF loader."""
+def mock_pdf_loader(request, test_pdf_content):
+    """Mock PyPDF2 PDF loader.
+
+    Page texts default to two copies of ``test_pdf_content``; override them
+    with ``@pytest.mark.parametrize("mock_pdf_loader", [[...]], indirect=True)``.
+    """
+    page_texts = getattr(request, "param", [test_pdf_content, test_pdf_content])
     with patch("dataSource.PdfReader") as mock_pdf:
         mock_instance = MagicMock()
-        mock_page = MagicMock()
-        mock_page.extract_text.return_value = test_pdf_content
-        mock_instance.pages = [mock_page, mock_page]
+        mock_instance.pages = [
+            MagicMock(**{"extract_text.return_value": text}) for text in page_texts
+        ]
         mock_pdf.return_value = mock_instance
         yield mock_pdf
 
@@ -243,22 +365,3 @@ def mock_docx_loader(test_docx_content):
         mock_instance.paragraphs = [mock_para, mock_para]
         mock_docx.return_value = mock_instance
         yield mock_docx
-
-
-@pytest.fixture(autouse=True)
-def reset_database(db_session):
-    """Reset database between tests."""
-    yield
-    try:
-        db_session.rollback()
-    except Exception:
-        pass
-    for table in reversed(Base.metadata.sorted_tables):
-        try:
-            db_session.execute(table.delete())
-        except Exception:
-            pass
-    db_session.commit()
-
-# Pytest configuration
-
@@ -1,7 +1,26 @@
+from sqlalchemy import exists, insert, select
+
 from models import User, Session as SessionModel, Document, AuthSession
 from datetime import datetime, timedelta, timezone
 import uuid
 
+def persist(session, obj):
+    """Add ``obj`` and flush it so its id and column defaults are populated.
+
+    Flushing is enough inside the rolled-back ``db_session`` transaction; a
+    commit would only release and re-open the SAVEPOINT.
+    """
+    session.add(obj)
+    session.flush()
+    return obj
+
+
+def row_exists(session, model, **filters):
+    """Return whether a ``model`` row matches ``filters`` via SELECT EXISTS."""
+    criteria = [getattr(model, name) == value for name, value in filters.items()]
+    return session.scalar(select(exists().where(*criteria)))
+
+
 class UserFactory:
     """Factory for creating User instances."""
     
@@ -14,8 +33,7 @@ class UserFactory:
             email=email,
             hashed_password="hashed_password_placeholder" 
         )
-        session.add(user)
-        session.commit()
+        persist(session, user)
         # Return tuple to match legacy test expectations (user, password)
         return user, password
 
@@ -33,10 +51,35 @@ class SessionFactory:
             title=title,
             status=status
         )
-        session.add(chat_session)
-        session.commit()
+        persist(session, chat_session)
         return chat_session
 
+    @staticmethod
+    def create_batch(session, count, user_id=None, title="Test Session", status="ACTIVE"):
+        """Create ``count`` sessions with one add_all and a single flush."""
+        if user_id is None:
+            user, _ = UserFactory.create(session)
+            user_id = user.id
+
+        chat_sessions = [
+            SessionModel(user_id=user_id, title=title, status=status)
+            for _ in range(count)
+        ]
+        session.add_all(chat_sessions)
+        session.flush()
+        return chat_sessions
+
+    @staticmethod
+    def bulk_create_core(session, rows):
+        """Insert session rows in one executemany, skipping the unit of work.
+
+        ``rows`` are column dicts; ``id`` is generated when missing. Returns
+        the ids so callers can select the rows back if they need instances.
+        """
+        rows = [{"id": str(uuid.uuid4()), **row} for row in rows]
+        session.execute(insert(SessionModel.__table__), rows)
+        return [row["id"] for row in rows]
+
 class DocumentFactory:
     """Factory for creating Document instances."""
     
@@ -52,10 +95,29 @@ class DocumentFactory:
             file_size=1024,
             file_type=file_type
         )
-        session.add(doc)
-        session.commit()
+        persist(session, doc)
         return doc
 
+    @staticmethod
+    def create_batch(session, count, session_id=None, file_name="test.pdf", file_type="pdf"):
+        """Create ``count`` documents with one add_all and a single flush."""
+        if session_id is None:
+            chat_session = SessionFactory.create(session)
+            session_id = chat_session.id
+
+        docs = [
+            Document(
+                session_id=session_id,
+                file_name=file_name,
+                file_size=1024,
+                file_type=file_type
+            )
+            for _ in range(count)
+        ]
+        session.add_all(docs)
+        session.flush()
+        return docs
+
 class AuthSessionFactory:
     """Factory for creating AuthSession instances."""
     
@@ -69,6 +131,5 @@ class AuthSessionFactory:
             chat_session_id=chat_session_id,
             expires_at=expires
         )
-        session.add(auth_session)
-        session.commit()
+        persist(session, auth_session)
         return auth_session
\ No newline at end of file
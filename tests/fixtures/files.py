@@ -0,0 +1,8 @@
+class BytesFile:
+    """Minimal file-like object whose read() returns bytes, without getvalue()."""
+
+    def __init__(self, data: bytes):
+        self._data = data
+
+    def read(self):
+        return self._data
@@ -1,6 +1,7 @@
 """
 Integration tests for FastAPI endpoints in api.py
 """
+import asyncio
 import pytest
 from datetime import datetime, timedelta, timezone
 from unittest.mock import patch, MagicMock
@@ -330,6 +331,23 @@ class TestFileUploadEndpoints:
             assert response.status_code == 200 or response.status_code == 201
             assert response.json()["chunks"] == 5
 
+    def test_upload_processes_off_event_loop(self, client, test_user, valid_auth_token, test_session_data):
+        """Test document processing runs in a worker thread, not on the event loop."""
+        def add_documents(*args):
+            with pytest.raises(RuntimeError):
+                asyncio.get_running_loop()
+            return {"chunks_added": 1}
+
+        with patch("api.VectorDBService.add_documents_to_session", side_effect=add_documents) as mock_add:
+            response = client.post(
+                f"/sessions/{test_session_data.id}/upload",
+                headers={"Authorization": f"Bearer {valid_auth_token}"},
+                files={"file": ("test.txt", b"This is test content", "text/plain")},
+            )
+
+        assert response.status_code == 200
+        mock_add.assert_called_once()
+
     def test_upload_docx_file(self, client, test_user, valid_auth_token, test_session_data):
         """Test uploading a DOCX file."""
         with patch("api.VectorDBService.add_documents_to_session") as mock_add:
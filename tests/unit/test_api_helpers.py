@@ -2,6 +2,7 @@
 Unit tests for helper functions in utils/conversation_helper.py
 """
 import pytest
+from types import SimpleNamespace
 from unittest.mock import MagicMock, patch, ANY
 from utils.conversation_helper import extract_message_content, get_session_conversation
 
@@ -57,6 +58,16 @@ class TestApiHelpers:
         result = extract_message_content(msg)
         assert result["role"] == "tool"
 
+    def test_extract_message_content_unlisted_type(self):
+        """Test unlisted message classes are classified by name and remembered."""
+        msg = MagicMock()
+        msg.content = "Partial"
+        msg.__class__.__name__ = "HumanMessageChunk"
+
+        with patch.dict("utils.conversation_helper._ROLE_BY_TYPE") as roles:
+            assert extract_message_content(msg)["role"] == "user"
+            assert roles["HumanMessageChunk"] == "user"
+
     def test_get_session_conversation_empty(self):
         """Test retrieving history when empty."""
         mock_cp = MagicMock()
@@ -99,12 +110,37 @@ class TestApiHelpers:
         assert len(messages) == 2
         assert messages[0]["content"] == "Hello"
         assert messages[1]["content"] == "Hi there"
+        # Each message is attributed to the oldest checkpoint it appears in
+        assert [m["checkpoint_id"] for m in messages] == ["cp_id_1", "cp_id_2"]
+        assert result["checkpoint_count"] == 2
+
+    def test_get_session_conversation_streams_checkpoints(self):
+        """Test checkpoints are consumed as an iterator and limit keeps the newest messages."""
+        msgs = [SimpleNamespace(content=f"m{i}", id=f"msg{i}") for i in range(3)]
+        checkpoints = [
+            SimpleNamespace(checkpoint={"channel_values": {"messages": msgs[:n]}, "ts": f"t{n}", "id": f"cp{n}"})
+            for n in (3, 2, 1)
+        ]
 
-    def test_get_session_conversation_error(self):
-        """Test error handling in history retrieval."""
         mock_cp = MagicMock()
-        mock_cp.list.side_effect = Exception("DB Error")
-        
+        mock_cp.list.return_value = iter(checkpoints)
+
+        result = get_session_conversation("session1", checkpointer=mock_cp, limit=2)
+
+        assert [m["id"] for m in result["messages"]] == ["msg1", "msg2"]
+        assert [m["checkpoint_id"] for m in result["messages"]] == ["cp2", "cp3"]
+        assert result["checkpoint_count"] == 3
+
+    def test_get_session_conversation_messages_without_id(self):
+        """Test messages without an id fall back to checkpoint position."""
+        msg = SimpleNamespace(content="Hello")
+
+        cp_tuple = MagicMock()
+        cp_tuple.checkpoint = {"channel_values": {"messages": [msg]}, "ts": "2023-01-01T10:00:00", "id": "cp_id_1"}
+
+        mock_cp = MagicMock()
+        mock_cp.list.return_value = [cp_tuple]
+
         result = get_session_conversation("session1", checkpointer=mock_cp)
-        assert "error" in result
-        assert result["messages"] == []
+
+        assert [m["id"] for m in result["messages"]] == ["cp_id_1_0"]
@@ -2,52 +2,60 @@
 Additional unit tests for api.py internals and startup/shutdown.
 """
 import pytest
-from unittest.mock import patch, MagicMock, AsyncMock
+from unittest.mock import patch, Mock, MagicMock, AsyncMock, create_autospec
 from contextlib import asynccontextmanager
+from langgraph.checkpoint.sqlite import SqliteSaver
 from api import lifespan, app
 from utils.conversation_helper import get_session_conversation
 
+@pytest.fixture
+def anyio_backend():
+    """Run anyio tests on asyncio only; the app never runs under trio."""
+    return "asyncio"
+
+
 @pytest.mark.anyio
-async def test_lifespan():
+async def test_lifespan(monkeypatch):
     """Test application lifespan (startup and shutdown)."""
-    # Mock init_db and SqliteSaver
-    with patch("api.init_db") as mock_init_db, \
-         patch("api.SqliteSaver") as mock_saver, \
-         patch("api.os.getenv") as mock_getenv:
-        
-        # Setup mocks
-        mock_manager = MagicMock()
-        mock_saver.from_conn_string.return_value = mock_manager
-        
-        mock_checkpointer = MagicMock()
-        mock_manager.__enter__.return_value = mock_checkpointer
-        
-        # Test startup
-        async with lifespan(app):
-            mock_init_db.assert_called_once()
-            mock_saver.from_conn_string.assert_called()
-            mock_manager.__enter__.assert_called()
-            
-        # Test shutdown (context exit)
-        # In api.py: checkpointer.__exit__(None, None, None) is called
-        # checkpointer is the result of __enter__, which is mock_checkpointer
-        mock_checkpointer.__exit__.assert_called()
-
-def test_get_session_conversation_fallback():
-    """Test get_session_conversation fallback when checkpointer arg is None."""
-    # Patch SqliteSaver in the utils module where it is used
-    with patch("utils.conversation_helper.SqliteSaver") as mock_saver:
-        mock_instance = MagicMock()
-        mock_saver.from_conn_string.return_value = mock_instance
-        mock_instance.__enter__.return_value = MagicMock() # The entered object
-        
-        # Mock the list method on the ENTERED object? 
-        mock_instance.__enter__.return_value.list.return_value = []
-        
-        # Call without checkpointer arg to trigger fallback
-        get_session_conversation("session1", checkpointer=None)
-        
+    mock_init_db = MagicMock()
+    mock_saver = create_autospec(SqliteSaver, spec_set=True)
+    monkeypatch.setattr("api.init_db", mock_init_db)
+    monkeypatch.setattr("api.SqliteSaver", mock_saver)
+
+    # Setup mocks
+    mock_manager = MagicMock()
+    mock_saver.from_conn_string.return_value = mock_manager
+
+    mock_checkpointer = Mock(spec=["__exit__"])
+    mock_checkpointer.__exit__ = Mock()
+    mock_manager.__enter__.return_value = mock_checkpointer
+
+    # Test startup
+    async with lifespan(app):
+        mock_init_db.assert_called_once()
         mock_saver.from_conn_string.assert_called()
+        mock_manager.__enter__.assert_called()
+
+    # Test shutdown (context exit)
+    # In api.py: checkpointer.__exit__(None, None, None) is called
+    # checkpointer is the result of __enter__, which is mock_checkpointer
+    mock_checkpointer.__exit__.assert_called()
+
+@patch("utils.conversation_helper.SqliteSaver")
+def test_get_session_conversation_fallback(sqlite_saver_mock):
+    """Test get_session_conversation fallback when checkpointer arg is None."""
+    mock_instance = MagicMock()
+    sqlite_saver_mock.from_conn_string.return_value = mock_instance
+    # The entered saver is only asked for .list()
+    mock_instance.__enter__.return_value = Mock(spec=["list"], list=Mock(return_value=[]))
+    
+    # Call without checkpointer arg to trigger fallback
+    result = get_session_conversation("session1", checkpointer=None)
+    
+    sqlite_saver_mock.from_conn_string.assert_called()
+    mock_instance.__enter__.return_value.list.assert_called_once()
+    mock_instance.__exit__.assert_called_once()
+    assert "error" not in result
 
 def test_get_session_conversation_exception():
     """Test exception handling in get_session_conversation."""
@@ -56,4 +64,4 @@ def test_get_session_conversation_exception():
     
     result = get_session_conversation("session1", checkpointer=mock_cp)
     assert "error" in result
-    assert result["messages"] == []
\ No newline at end of file
+    assert result["messages"] == []
@@ -2,11 +2,18 @@
 Unit tests for auth_service.py
 """
 import pytest
+import time_machine
+from unittest.mock import patch
 from datetime import datetime, timedelta, timezone
-from auth_service import AuthService
+from auth_service import AuthService, DEFAULT_BCRYPT_ROUNDS, SESSION_EXPIRE_MINUTES
 from models import AuthSession
 
+FROZEN_NOW = datetime(2024, 1, 1, tzinfo=timezone.utc)
+# bcrypt hash of "TestPassword123!" at cost 4, so verify tests skip hashing.
+KNOWN_HASH = "$2b$04$MyDKmnTcHivblca0l.VpueQJ6cDrgje6dXzodipdMw.loaGKjG1W2"
 
+
+@pytest.mark.xdist_group("bcrypt")
 class TestAuthServicePasswordHashing:
     """Test password hashing and verification."""
 
@@ -20,42 +27,51 @@ class TestAuthServicePasswordHashing:
         # bcrypt hashes should start with $2b$
         assert hashed.startswith("$2b$")
 
+    @pytest.mark.slow_kdf
+    def test_hash_password_production_cost(self, auth_service, monkeypatch):
+        """Test the default cost factor applies when BCRYPT_ROUNDS is unset."""
+        monkeypatch.delenv("BCRYPT_ROUNDS", raising=False)
+
+        hashed = auth_service.hash_password("TestPassword123!")
+
+        assert hashed.startswith(f"$2b${DEFAULT_BCRYPT_ROUNDS}$")
+        assert len(hashed) == 60
+
     def test_verify_password_success(self, auth_service):
         """Test password verification with correct password."""
         password = "TestPassword123!"
-        hashed = auth_service.hash_password(password)
 
-        assert auth_service.verify_password(password, hashed) is True
+        assert auth_service.verify_password(password, KNOWN_HASH) is True
 
     def test_verify_password_failure(self, auth_service):
         """Test password verification with wrong password."""
-        password = "TestPassword123!"
         wrong_password = "WrongPassword123!"
-        hashed = auth_service.hash_password(password)
 
-        assert auth_service.verify_password(wrong_password, hashed) is False
+        assert auth_service.verify_password(wrong_password, KNOWN_HASH) is False
 
 
+@pytest.mark.usefixtures("fast_hash")
 class TestAuthServiceSession:
     """Test session management."""
 
     def test_create_session(self, auth_service, db_session, test_user):
         """Test creating a new session."""
-        token = auth_service.create_session(
-            db=db_session,
-            user_id=test_user["user"].id,
-            chat_session_id=None
-        )
+        with time_machine.travel(FROZEN_NOW, tick=False):
+            token = auth_service.create_session(
+                db=db_session,
+                user_id=test_user["user"].id,
+                chat_session_id=None
+            )
 
         assert isinstance(token, str)
         assert len(token) > 20
-        
-        # Verify in DB
-        session = db_session.query(AuthSession).filter(AuthSession.token == token).first()
+
+        session = db_session.get(AuthSession, token)
         assert session is not None
         assert session.user_id == test_user["user"].id
         assert session.chat_session_id is None
-        assert session.expires_at.replace(tzinfo=timezone.utc) > datetime.now(timezone.utc)
+        expected_expiry = FROZEN_NOW + timedelta(minutes=SESSION_EXPIRE_MINUTES)
+        assert session.expires_at.replace(tzinfo=timezone.utc) == expected_expiry
 
     def test_get_session_valid(self, auth_service, db_session, test_user):
         """Test retrieving a valid session."""
@@ -71,41 +87,28 @@ class TestAuthServiceSession:
         session = auth_service.get_session(db_session, "invalid_token")
         assert session is None
 
-    def test_get_session_expired(self, auth_service, db_session, test_user):
+    def test_get_session_expired(self, auth_service, db_session, expired_auth_token):
         """Test retrieving an expired session."""
-        token = "expired_token"
-        expired_session = AuthSession(
-            token=token,
-            user_id=test_user["user"].id,
-            expires_at=datetime.now(timezone.utc) - timedelta(hours=1)
-        )
-        db_session.add(expired_session)
-        db_session.commit()
-
         # Should return None and delete the session
-        session = auth_service.get_session(db_session, token)
+        session = auth_service.get_session(db_session, expired_auth_token)
         assert session is None
         
         # Verify deletion
-        db_session_check = db_session.query(AuthSession).filter(AuthSession.token == token).first()
+        db_session_check = db_session.query(AuthSession).filter(AuthSession.token == expired_auth_token).first()
         assert db_session_check is None
 
-    def test_delete_session(self, auth_service, db_session, test_user):
-        """Test deleting a session (logout)."""
-        token = auth_service.create_session(db_session, test_user["user"].id)
-        
-        # Verify it exists
-        assert auth_service.get_session(db_session, token) is not None
-        
-        # Delete it
+    @pytest.mark.parametrize("scenario", ["existing", "missing"])
+    def test_delete_session_scenarios(self, auth_service, db_session, test_user, scenario):
+        """Test deleting a session (logout); unknown tokens should not error."""
+        if scenario == "existing":
+            token = auth_service.create_session(db_session, test_user["user"].id)
+            assert auth_service.get_session(db_session, token) is not None
+        else:
+            token = "nonexistent_token"
+
         auth_service.delete_session(db_session, token)
-        
-        # Verify it's gone
-        assert auth_service.get_session(db_session, token) is None
 
-    def test_delete_nonexistent_session(self, auth_service, db_session):
-        """Test deleting a session that doesn't exist (should not error)."""
-        auth_service.delete_session(db_session, "nonexistent_token")
+        assert auth_service.get_session(db_session, token) is None
 
 
 class TestAuthServiceEdgeCases:
@@ -114,5 +117,9 @@ class TestAuthServiceEdgeCases:
     def test_hash_very_long_password(self, auth_service):
         """Test hashing very long password raises error."""
         password = "x" * 1000
-        with pytest.raises(ValueError, match="Password is too long"):
-            auth_service.hash_password(password)
\ No newline at end of file
+        with patch("auth_service.bcrypt.hashpw") as mock_hashpw:
+            with pytest.raises(ValueError, match="Password is too long"):
+                auth_service.hash_password(password)
+
+        # The length guard must reject the input before any key stretching
+        mock_hashpw.assert_not_called()
\ No newline at end of file
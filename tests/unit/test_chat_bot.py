@@ -2,10 +2,22 @@
 Unit tests for ChatBot class in chatBot.py
 """
 import pytest
+from types import SimpleNamespace
 from unittest.mock import MagicMock, patch, ANY
-import os
 from chatBot import ChatBot, create_session_chatbot
 
+# Canned agent responses; chat() only reads them, so they are shared.
+SIMPLE_RESPONSE = {"messages": [SimpleNamespace(content="Hello user")]}
+EMPTY_RESPONSE = {"messages": []}
+BLOCK_RESPONSE = {
+    "messages": [
+        SimpleNamespace(content=[
+            {"type": "text", "text": "This is text response."},
+            {"type": "image", "image_url": "..."}
+        ])
+    ]
+}
+
 # Dummy classes to mock dependencies
 class DummyCheckpointer:
     def __enter__(self):
@@ -14,22 +26,17 @@ class DummyCheckpointer:
         pass
 
 @pytest.fixture
-def mock_env():
-    with patch.dict(os.environ, {"GOOGLE_API_KEY": "fake-api-key"}):
-        yield
+def mock_env(monkeypatch):
+    monkeypatch.setenv("GOOGLE_API_KEY", "fake-api-key")
 
-@pytest.fixture
-def mock_dependencies():
+@pytest.fixture(scope="module")
+def patched_dependencies():
     with patch("chatBot.ChatGoogleGenerativeAI") as mock_llm, \
          patch("chatBot.GoogleGenerativeAIEmbeddings") as mock_embeddings, \
          patch("chatBot.VectorDBService.get_session_retriever") as mock_retriever, \
          patch("chatBot.create_retriever_tool") as mock_tool, \
          patch("chatBot.create_agent") as mock_agent:
         
-        mock_retriever.return_value = MagicMock()
-        mock_tool.return_value = MagicMock()
-        mock_agent.return_value = MagicMock()
-        
         yield {
             "llm": mock_llm,
             "embeddings": mock_embeddings,
@@ -38,6 +45,17 @@ def mock_dependencies():
             "agent": mock_agent
         }
 
+@pytest.fixture
+def mock_dependencies(patched_dependencies):
+    # Patches are installed once per module; only call history and the
+    # returned objects are refreshed so tests cannot leak side effects.
+    for mock in patched_dependencies.values():
+        mock.reset_mock()
+    patched_dependencies["retriever"].return_value = MagicMock()
+    patched_dependencies["tool"].return_value = MagicMock()
+    patched_dependencies["agent"].return_value = MagicMock()
+    yield patched_dependencies
+
 class TestChatBot:
     """Test ChatBot class functionality."""
 
@@ -66,21 +84,19 @@ class TestChatBot:
         mock_dependencies["retriever"].assert_called()
         mock_dependencies["agent"].assert_called()
 
-    def test_initialize_missing_api_key(self):
+    def test_initialize_missing_api_key(self, monkeypatch):
         """Test initialization raises error without API key."""
-        with patch.dict(os.environ, {}, clear=True):
-            bot = ChatBot("user1", "session1")
-            with pytest.raises(ValueError, match="GOOGLE_API_KEY"):
-                bot.initialize(DummyCheckpointer())
+        monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
+        bot = ChatBot("user1", "session1")
+        with pytest.raises(ValueError, match="GOOGLE_API_KEY"):
+            bot.initialize(DummyCheckpointer())
 
     def test_chat_success(self, mock_env, mock_dependencies):
         """Test successful chat interaction."""
         bot = ChatBot("user1", "session1")
         bot.initialize(DummyCheckpointer())
         
-        # Mock agent response
-        mock_response = {"messages": [MagicMock(content="Hello user")]}
-        bot.agent.invoke.return_value = mock_response
+        bot.agent.invoke.return_value = SIMPLE_RESPONSE
         
         response = bot.chat("Hi")
         assert response == "Hello user"
@@ -112,7 +128,7 @@ class TestChatBot:
         bot = ChatBot("user1", "session1")
         bot.initialize(DummyCheckpointer())
         
-        bot.agent.invoke.return_value = {"messages": []}
+        bot.agent.invoke.return_value = EMPTY_RESPONSE
         
         response = bot.chat("Hi")
         assert response == "No response generated."
@@ -122,12 +138,7 @@ class TestChatBot:
         bot = ChatBot("user1", "session1")
         bot.initialize(DummyCheckpointer())
         
-        content_blocks = [
-            {"type": "text", "text": "This is text response."}, 
-            {"type": "image", "image_url": "..."}
-        ]
-        mock_response = {"messages": [MagicMock(content=content_blocks)]}
-        bot.agent.invoke.return_value = mock_response
+        bot.agent.invoke.return_value = BLOCK_RESPONSE
         
         response = bot.chat("Show me")
         assert response == "This is text response."
@@ -12,40 +12,48 @@ from dataSource import (
     extractTextFromTxt,
     splitTextIntoChunks,
 )
+from tests.fixtures.files import BytesFile
 
 
-class TestProcessFile:
-    """Test processFile router function."""
-
-    def test_process_pdf_file(self):
-        """Test processing PDF file."""
-        with patch("dataSource.extractTextFromPdf") as mock_pdf:
-            mock_pdf.return_value = "PDF content"
-
-            result = processFile("test.pdf", BytesIO(b"fake pdf data"))
-
-            assert result == "PDF content"
-            mock_pdf.assert_called_once()
+@pytest.fixture
+def fake_pdf_bytes():
+    """PDF stand-in; the mocked PdfReader never reads it."""
+    return BytesIO(b"fake pdf data")
 
-    def test_process_docx_file(self):
-        """Test processing DOCX file."""
-        with patch("dataSource.extractTextFromDocx") as mock_docx:
-            mock_docx.return_value = "DOCX content"
 
-            result = processFile("test.docx", BytesIO(b"fake docx data"))
+@pytest.fixture
+def fake_docx_bytes():
+    """DOCX stand-in; the mocked Document never reads it."""
+    return BytesIO(b"fake docx data")
 
-            assert result == "DOCX content"
-            mock_docx.assert_called_once()
 
-    def test_process_txt_file(self):
-        """Test processing TXT file."""
-        with patch("dataSource.extractTextFromTxt") as mock_txt:
-            mock_txt.return_value = "TXT content"
+@pytest.fixture(scope="module")
+def long_test_text():
+    """Multi-chunk input shared by the splitter tests."""
+    return "This is a test. " * 100
 
-            result = processFile("test.txt", BytesIO(b"fake txt data"))
+class TestProcessFile:
+    """Test processFile router function."""
 
-            assert result == "TXT content"
-            mock_txt.assert_called_once()
+    @pytest.mark.parametrize(
+        "file_name,target,content",
+        [
+            ("test.pdf", "dataSource.extractTextFromPdf", "PDF content"),
+            ("test.docx", "dataSource.extractTextFromDocx", "DOCX content"),
+            ("test.txt", "dataSource.extractTextFromTxt", "TXT content"),
+        ],
+        ids=["pdf", "docx", "txt"],
+    )
+    def test_process_file_routes_by_extension(self, file_name, target, content):
+        """Test processFile dispatches to the extractor for the extension."""
+        file_obj = BytesIO(b"fake data")
+        with patch(target) as mock_extract:
+            mock_extract.return_value = content
+
+            result = processFile(file_name, file_obj)
+
+            assert result == content
+            mock_extract.assert_called_once_with(file_obj)
 
     def test_process_unknown_file_type(self):
         """Test processing unknown file type."""
@@ -56,53 +64,41 @@ class TestProcessFile:
 class TestExtractPdfText:
     """Test PDF text extraction."""
 
-    def test_extract_pdf_basic(self, mock_pdf_loader, test_pdf_content):
+    def test_extract_pdf_basic(self, mock_pdf_loader, test_pdf_content, fake_pdf_bytes):
         """Test basic PDF extraction."""
-        pdf_file = BytesIO(b"fake pdf data")
-
-        result = extractTextFromPdf(pdf_file)
+        result = extractTextFromPdf(fake_pdf_bytes)
 
         assert test_pdf_content in result
         assert len(result) > 0
 
-    def test_extract_pdf_multiple_pages(self, mock_pdf_loader, test_pdf_content):
+    def test_extract_pdf_multiple_pages(self, mock_pdf_loader, test_pdf_content, fake_pdf_bytes):
         """Test PDF extraction with multiple pages."""
-        pdf_file = BytesIO(b"fake pdf data")
-
-        result = extractTextFromPdf(pdf_file)
+        result = extractTextFromPdf(fake_pdf_bytes)
 
         # Should extract from both pages
         assert len(result) > len(test_pdf_content)
 
-    def test_extract_pdf_empty_file(self):
+    @pytest.mark.parametrize("mock_pdf_loader", [[]], indirect=True)
+    def test_extract_pdf_empty_file(self, mock_pdf_loader):
         """Test extracting empty PDF."""
-        with patch("dataSource.PdfReader") as mock_pdf:
-            mock_instance = MagicMock()
-            mock_instance.pages = []
-            mock_pdf.return_value = mock_instance
-
-            result = extractTextFromPdf(BytesIO(b"empty"))
+        result = extractTextFromPdf(BytesIO(b"empty"))
 
-            assert result == "" or len(result) == 0
+        assert result == "" or len(result) == 0
 
 
 class TestExtractDocxText:
     """Test DOCX text extraction."""
 
-    def test_extract_docx_basic(self, mock_docx_loader, test_docx_content):
+    def test_extract_docx_basic(self, mock_docx_loader, test_docx_content, fake_docx_bytes):
         """Test basic DOCX extraction."""
-        docx_file = BytesIO(b"fake docx data")
-
-        result = extractTextFromDocx(docx_file)
+        result = extractTextFromDocx(fake_docx_bytes)
 
         assert test_docx_content in result
         assert len(result) > 0
 
-    def test_extract_docx_multiple_paragraphs(self, mock_docx_loader, test_docx_content):
+    def test_extract_docx_multiple_paragraphs(self, mock_docx_loader, test_docx_content, fake_docx_bytes):
         """Test DOCX extraction with multiple paragraphs."""
-        docx_file = BytesIO(b"fake docx data")
-
-        result = extractTextFromDocx(docx_file)
+        result = extractTextFromDocx(fake_docx_bytes)
 
         # Should extract from both paragraphs
         assert len(result) > len(test_docx_content)
@@ -124,57 +120,49 @@ class TestExtractTxtText:
 
     def test_extract_txt_basic(self, test_txt_content):
         """Test basic TXT extraction."""
-        txt_file = BytesIO(test_txt_content.encode())
-
-        result = extractTextFromTxt(txt_file)
+        result = extractTextFromTxt(BytesFile(test_txt_content.encode()))
 
         assert test_txt_content in result
 
     def test_extract_txt_with_encoding(self):
         """Test TXT extraction with different encoding."""
         content = "Test content with special chars: café"
-        txt_file = BytesIO(content.encode("utf-8"))
 
-        result = extractTextFromTxt(txt_file)
+        result = extractTextFromTxt(BytesIO(content.encode("utf-8")))
 
-        assert "café" in result or "caf" in result
+        assert result == content
 
     def test_extract_txt_empty_file(self):
         """Test extracting empty TXT file."""
-        result = extractTextFromTxt(BytesIO(b""))
+        result = extractTextFromTxt(BytesFile(b""))
 
         assert result == ""
 
     def test_extract_txt_multiline(self):
         """Test TXT extraction with multiple lines."""
         content = "Line 1\nLine 2\nLine 3"
-        txt_file = BytesIO(content.encode())
 
-        result = extractTextFromTxt(txt_file)
+        result = extractTextFromTxt(BytesFile(content.encode()))
 
-        assert "Line 1" in result
-        assert "Line 2" in result
-        assert "Line 3" in result
+        assert result.splitlines() == ["Line 1", "Line 2", "Line 3"]
 
 
 class TestSplitTextIntoChunks:
     """Test text chunking."""
 
-    def test_split_basic_text(self):
+    def test_split_basic_text(self, long_test_text):
         """Test splitting basic text."""
-        text = "This is a test. " * 100  # Long text
-        chunks = splitTextIntoChunks(text)
+        chunks = splitTextIntoChunks(long_test_text)
 
         assert len(chunks) > 0
         assert all(isinstance(chunk, str) for chunk in chunks)
 
-    def test_split_preserves_content(self):
+    def test_split_preserves_content(self, long_test_text):
         """Test that splitting preserves all content."""
-        text = "This is a test. " * 50
-        chunks = splitTextIntoChunks(text)
+        chunks = splitTextIntoChunks(long_test_text)
 
         combined = " ".join(chunks)
-        assert len(combined) >= len(text.strip())
+        assert len(combined) >= len(long_test_text.strip())
 
     def test_split_empty_text(self):
         """Test splitting empty text."""
@@ -192,9 +180,10 @@ class TestSplitTextIntoChunks:
 
     def test_split_respects_chunk_size(self):
         """Test splitting text respects chunk size."""
-        text = "This is a sentence. " * 50
+        text = "This is a sentence. " * 20
         chunks = splitTextIntoChunks(text, chunk_size=100, chunk_overlap=20)
-        
+
+        assert len(chunks) > 1
         for chunk in chunks:
             assert len(chunk) <= 100
 
@@ -222,12 +211,12 @@ class TestSplitTextIntoChunks:
 class TestDataSourceEdgeCases:
     """Test edge cases and error handling."""
 
-    def test_process_very_large_file(self, mock_pdf_loader):
+    @pytest.mark.parametrize(
+        "mock_pdf_loader", [["Large content " * 10000]], indirect=True
+    )
+    def test_process_very_large_file(self, mock_pdf_loader, fake_pdf_bytes):
         """Test processing very large file."""
-        large_content = "Large content " * 10000
-        mock_pdf_loader.return_value.pages[0].extract_text.return_value = large_content
-
-        result = processFile("large.pdf", BytesIO(b"fake large pdf"))
+        result = processFile("large.pdf", fake_pdf_bytes)
 
         assert len(result) > 0
 
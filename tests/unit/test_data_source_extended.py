@@ -5,6 +5,7 @@ import pytest
 import os
 from io import BytesIO
 from dataSource import processFile, extractTextFromTxt
+from tests.fixtures.files import BytesFile
 
 def test_process_file_not_found():
     """Test processFile with non-existent file."""
@@ -20,12 +21,7 @@ def test_extract_text_from_txt_bytes_io():
 
 def test_extract_text_from_txt_bytes():
     """Test extracting text from raw bytes (file-like read returns bytes)."""
-    # Mock a file-like object that returns bytes on read
-    class BytesFile:
-        def read(self):
-            return b"Hello Bytes"
-            
-    text = extractTextFromTxt(BytesFile())
+    text = extractTextFromTxt(BytesFile(b"Hello Bytes"))
     assert text == "Hello Bytes"
 
 def test_process_file_with_file_obj():
@@ -39,14 +39,12 @@ class TestDatabaseConfig:
             db = next(gen)
             
             assert db is mock_session
-            
+            mock_session.close.assert_not_called()
+
             # Clean up
-            try:
-                next(gen)
-            except StopIteration:
-                pass
-            
-            mock_session.close.assert_called()
+            gen.close()
+
+            mock_session.close.assert_called_once()
 
     @patch("database.Base.metadata.create_all")
     @patch("database.engine")
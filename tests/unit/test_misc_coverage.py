@@ -4,8 +4,7 @@ Coverage tests for Auth and Lifecycle to hit missing lines.
 import pytest
 from unittest.mock import MagicMock, patch
 from auth_service import AuthService
-from session_lifecycle import ArchivalPolicy, SessionLifecycle, SessionState
-from models import Session
+from session_lifecycle import ArchivalPolicy
 
 class TestMiscCoverage:
 
@@ -15,26 +14,15 @@ class TestMiscCoverage:
             assert AuthService.verify_password("pass", "hash") is False
 
     def test_cleanup_job_errors(self):
-        """Test cleanup job logging when transitions fail."""
+        """Test cleanup job logging when the archive and delete statements fail."""
         mock_db = MagicMock()
         mock_vector = MagicMock()
-        
-        # Mock sessions
-        session1 = MagicMock(spec=Session, status=SessionState.ACTIVE, id="s1")
-        session2 = MagicMock(spec=Session, status=SessionState.ARCHIVED, id="s2")
-        
-        mock_db.query.return_value.filter.return_value.all.side_effect = [
-            [session1], # Inactive sessions
-            [session2]  # Archived sessions
-        ]
-        
-        # Force "should" to True
-        with patch("session_lifecycle.ArchivalPolicy.should_auto_archive", return_value=True):
-             with patch("session_lifecycle.ArchivalPolicy.should_hard_delete", return_value=True):
-                 # Force transition to raise exception
-                 with patch("session_lifecycle.SessionLifecycle.transition", side_effect=Exception("Lifecycle fail")):
-                     
-                     ArchivalPolicy.cleanup_job(mock_db, mock_vector)
-                     
-                     # We expect it to catch the exception and log error, not crash.
-                     # Coverage should be hit.
\ No newline at end of file
+
+        # Force both the bulk archive UPDATE and the expired-session DELETEs to fail
+        mock_db.execute.side_effect = Exception("Statement fail")
+
+        # We expect it to catch the exceptions and log errors, not crash.
+        ArchivalPolicy.cleanup_job(mock_db, mock_vector)
+
+        assert mock_db.rollback.call_count == 2
+        mock_vector.delete_session_collection.assert_not_called()
@@ -3,10 +3,17 @@ Unit tests for models.py and database interactions.
 """
 import pytest
 from datetime import datetime, timezone
-from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, selectinload
 
 from models import User, Session as SessionModel, Document, AuthSession, SessionStatus
-from tests.fixtures.factories import UserFactory, SessionFactory, DocumentFactory, AuthSessionFactory
+from tests.fixtures.factories import UserFactory, SessionFactory, DocumentFactory, AuthSessionFactory, persist, row_exists
+
+_ACTIVE_BY_USER = select(SessionModel).where(
+    SessionModel.user_id == bindparam("uid"),
+    SessionModel.status == "ACTIVE",
+)
 
 
 class TestUserModel:
@@ -15,9 +22,7 @@ class TestUserModel:
     def test_create_user(self, db_session):
         """Test creating a user."""
         user = User(email="test@example.com", hashed_password="hashed_pass")
-        db_session.add(user)
-        db_session.commit()
-        db_session.refresh(user)
+        persist(db_session, user)
 
         assert user.id is not None
         assert user.email == "test@example.com"
@@ -34,17 +39,18 @@ class TestUserModel:
         db_session.commit()
 
         db_session.add(user2)
-        with pytest.raises(Exception):  # IntegrityError
+        with pytest.raises(IntegrityError):
             db_session.commit()
 
-    def test_user_relationships(self, db_session):
+    def test_user_relationships(self, db_session, assert_max_queries):
         """Test User relationships."""
         user, _ = UserFactory.create(db_session)
         session = SessionFactory.create(db_session, user_id=user.id)
 
-        db_session.refresh(user)
-        assert len(user.sessions) == 1
-        assert user.sessions[0].id == session.id
+        with assert_max_queries(2):
+            db_session.refresh(user)
+            assert len(user.sessions) == 1
+            assert user.sessions[0].id == session.id
 
     def test_user_cascade_delete(self, db_session):
         """Test cascade delete when user is deleted."""
@@ -55,10 +61,10 @@ class TestUserModel:
         db_session.delete(user)
         db_session.commit()
 
-        deleted_session = db_session.query(SessionModel).filter(SessionModel.id == session_id).first()
-        assert deleted_session is None
+        assert not row_exists(db_session, SessionModel, id=session_id)
 
 
+@pytest.mark.usefixtures("fast_hash")
 class TestSessionModel:
     """Test Session model."""
 
@@ -69,9 +75,7 @@ class TestSessionModel:
             title="Test Session",
             status="ACTIVE",
         )
-        db_session.add(session)
-        db_session.commit()
-        db_session.refresh(session)
+        persist(db_session, session)
 
         assert session.id is not None
         assert session.user_id == test_user["user"].id
@@ -84,9 +88,7 @@ class TestSessionModel:
             user_id=test_user["user"].id,
             title="Test Session",
         )
-        db_session.add(session)
-        db_session.commit()
-        db_session.refresh(session)
+        persist(db_session, session)
 
         assert session.status == "ACTIVE"
 
@@ -98,8 +100,8 @@ class TestSessionModel:
             title="Test Session",
             metadata_=metadata,
         )
-        db_session.add(session)
-        db_session.commit()
+        persist(db_session, session)
+        # Reload to check the JSON round trip
         db_session.refresh(session)
 
         assert session.metadata_ == metadata
@@ -110,9 +112,7 @@ class TestSessionModel:
             user_id=test_user["user"].id,
             title="Test Session",
         )
-        db_session.add(session)
-        db_session.commit()
-        db_session.refresh(session)
+        persist(db_session, session)
 
         assert session.created_at is not None
         assert session.updated_at is not None
@@ -125,9 +125,7 @@ class TestSessionModel:
             user_id=test_user["user"].id,
             title="Test Session",
         )
-        db_session.add(session)
-        db_session.commit()
-        db_session.refresh(session)
+        persist(db_session, session)
 
         assert session.archived_at is None
 
@@ -150,7 +148,7 @@ class TestSessionModel:
         )
 
         db_session.add_all([session_active, session_archived, session_deleted])
-        db_session.commit()
+        db_session.flush()
 
         assert session_active.status == "ACTIVE"
         assert session_archived.status == "ARCHIVED"
@@ -171,9 +169,7 @@ class TestDocumentModel:
             storage_path="/uploads/test.pdf",
             chunk_count=5,
         )
-        db_session.add(document)
-        db_session.commit()
-        db_session.refresh(document)
+        persist(db_session, document)
 
         assert document.id is not None
         assert document.session_id == session.id
@@ -194,7 +190,7 @@ class TestDocumentModel:
         session = SessionFactory.create(db_session)
         document = DocumentFactory.create(db_session, session_id=session.id)
 
-        retrieved_doc = db_session.query(Document).filter(Document.id == document.id).first()
+        retrieved_doc = db_session.get(Document, document.id)
         assert retrieved_doc.session_id == session.id
 
     def test_document_cascade_delete(self, db_session):
@@ -206,18 +202,19 @@ class TestDocumentModel:
         db_session.delete(session)
         db_session.commit()
 
-        deleted_doc = db_session.query(Document).filter(Document.id == document_id).first()
-        assert deleted_doc is None
+        assert not row_exists(db_session, Document, id=document_id)
 
-    def test_document_multiple_file_types(self, db_session):
+    def test_document_multiple_file_types(self, db_session, assert_max_queries):
         """Test documents with different file types."""
         session = SessionFactory.create(db_session)
         pdf_doc = DocumentFactory.create(db_session, session_id=session.id, file_type="pdf")
         docx_doc = DocumentFactory.create(db_session, session_id=session.id, file_type="docx")
         txt_doc = DocumentFactory.create(db_session, session_id=session.id, file_type="txt")
 
-        db_session.refresh(session)
-        assert len(session.documents) == 3
+        # One SELECT for the session row and one for its documents
+        with assert_max_queries(2):
+            db_session.refresh(session)
+            assert len(session.documents) == 3
         assert any(d.file_type == "pdf" for d in session.documents)
         assert any(d.file_type == "docx" for d in session.documents)
         assert any(d.file_type == "txt" for d in session.documents)
@@ -235,9 +232,7 @@ class TestAuthSessionModel:
             created_at=datetime.now(timezone.utc),
             expires_at=datetime.now(timezone.utc),
         )
-        db_session.add(token)
-        db_session.commit()
-        db_session.refresh(token)
+        persist(db_session, token)
 
         assert token.token == "token-123"
         assert token.user_id == user.id
@@ -259,47 +254,57 @@ class TestAuthSessionModel:
         db_session.delete(user)
         db_session.commit()
 
-        deleted_token = db_session.query(AuthSession).filter(AuthSession.token == token_str).first()
-        assert deleted_token is None
+        assert not row_exists(db_session, AuthSession, token=token_str)
 
 
 class TestDatabaseRelationships:
     """Test complex database relationships."""
 
-    def test_user_has_multiple_sessions(self, db_session):
+    def test_user_has_multiple_sessions(self, db_session, strict_loading, assert_max_queries):
         """Test user can have multiple sessions."""
         user, _ = UserFactory.create(db_session)
-        sessions = [SessionFactory.create(db_session, user_id=user.id) for _ in range(5)]
-
-        db_session.refresh(user)
-        assert len(user.sessions) == 5
-
-    def test_session_has_multiple_documents(self, db_session):
+        SessionFactory.create_batch(db_session, user_id=user.id, count=5)
+
+        with assert_max_queries(2):
+            loaded = db_session.scalars(
+                select(User)
+                .where(User.id == user.id)
+                .options(selectinload(User.sessions))
+                .execution_options(populate_existing=True)
+            ).one()
+            assert len(loaded.sessions) == 5
+
+    def test_session_has_multiple_documents(self, db_session, strict_loading, assert_max_queries):
         """Test session can have multiple documents."""
         session = SessionFactory.create(db_session)
-        documents = [DocumentFactory.create(db_session, session_id=session.id) for _ in range(3)]
+        DocumentFactory.create_batch(db_session, session_id=session.id, count=3)
 
-        db_session.refresh(session)
-        assert len(session.documents) == 3
+        with assert_max_queries(2):
+            loaded = db_session.scalars(
+                select(SessionModel)
+                .where(SessionModel.id == session.id)
+                .options(selectinload(SessionModel.documents))
+                .execution_options(populate_existing=True)
+            ).one()
+            assert len(loaded.documents) == 3
 
     def test_query_sessions_by_status(self, db_session):
         """Test querying sessions by status."""
         user, _ = UserFactory.create(db_session)
-        SessionFactory.create(db_session, user_id=user.id, status="ACTIVE")
-        SessionFactory.create(db_session, user_id=user.id, status="ACTIVE")
-        SessionFactory.create(db_session, user_id=user.id, status="ARCHIVED")
+        SessionFactory.bulk_create_core(db_session, [
+            {"user_id": user.id, "status": "ACTIVE"},
+            {"user_id": user.id, "status": "ACTIVE"},
+            {"user_id": user.id, "status": "ARCHIVED"},
+        ])
 
-        active_sessions = db_session.query(SessionModel).filter(
-            SessionModel.user_id == user.id,
-            SessionModel.status == "ACTIVE"
-        ).all()
+        active_sessions = db_session.scalars(_ACTIVE_BY_USER, {"uid": user.id}).all()
 
         assert len(active_sessions) == 2
 
     def test_query_documents_by_session(self, db_session):
         """Test querying documents by session."""
         session = SessionFactory.create(db_session)
-        documents = [DocumentFactory.create(db_session, session_id=session.id) for _ in range(2)]
+        documents = DocumentFactory.create_batch(db_session, session_id=session.id, count=2)
 
         queried_docs = db_session.query(Document).filter(Document.session_id == session.id).all()
         assert len(queried_docs) == 2
\ No newline at end of file
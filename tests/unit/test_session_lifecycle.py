@@ -2,12 +2,26 @@
 Unit tests for session_lifecycle.py
 """
 import pytest
-from datetime import datetime, timedelta, timezone
-from unittest.mock import patch, MagicMock
+from datetime import datetime, timezone
+from unittest.mock import patch
+from sqlalchemy import event
 
 from session_lifecycle import SessionLifecycle, SessionState, ArchivalPolicy
-from models import Session as SessionModel
-from tests.fixtures.factories import SessionFactory, UserFactory
+from models import Session as SessionModel, Document
+from sessionManager import SessionManager
+from tests.fixtures.factories import DocumentFactory, SessionFactory, UserFactory, row_exists
+
+FROZEN_NOW = datetime(2024, 1, 1, tzinfo=timezone.utc)
+# Fixed points around the 30-day inactivity and 90-day retention windows
+TEN_DAYS_AGO = datetime(2023, 12, 22, tzinfo=timezone.utc)
+THIRTY_ONE_DAYS_AGO = datetime(2023, 12, 1, tzinfo=timezone.utc)
+NINETY_ONE_DAYS_AGO = datetime(2023, 10, 2, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def frozen_now(time_machine):
+    """Pin the clock so archival thresholds are evaluated against FROZEN_NOW."""
+    time_machine.move_to(FROZEN_NOW, tick=False)
 
 
 class TestSessionState:
@@ -23,157 +37,84 @@ class TestSessionState:
 class TestSessionLifecycleStateTransitions:
     """Test SessionLifecycle state transition validation."""
 
-    def test_valid_transition_active_to_archived(self):
-        """Test valid transition from ACTIVE to ARCHIVED."""
-        assert SessionLifecycle.can_transition(
-            SessionState.ACTIVE, SessionState.ARCHIVED
-        ) is True
-
-    def test_valid_transition_archived_to_active(self):
-        """Test valid transition from ARCHIVED back to ACTIVE."""
-        assert SessionLifecycle.can_transition(
-            SessionState.ARCHIVED, SessionState.ACTIVE
-        ) is True
-
-    def test_valid_transition_active_to_deleted(self):
-        """Test valid transition from ACTIVE to DELETED."""
-        assert SessionLifecycle.can_transition(
-            SessionState.ACTIVE, SessionState.DELETED
-        ) is True
-
-    def test_valid_transition_archived_to_deleted(self):
-        """Test valid transition from ARCHIVED to DELETED."""
-        assert SessionLifecycle.can_transition(
-            SessionState.ARCHIVED, SessionState.DELETED
-        ) is True
-
-    def test_invalid_transition_deleted_to_active(self):
-        """Test invalid transition from DELETED to ACTIVE."""
-        assert SessionLifecycle.can_transition(
-            SessionState.DELETED, SessionState.ACTIVE
-        ) is False
-
-    def test_invalid_transition_deleted_to_archived(self):
-        """Test invalid transition from DELETED to ARCHIVED."""
-        assert SessionLifecycle.can_transition(
-            SessionState.DELETED, SessionState.ARCHIVED
-        ) is False
-
-    def test_same_state_transition(self):
-        """Test transition to same state."""
-        assert SessionLifecycle.can_transition(
-            SessionState.ACTIVE, SessionState.ACTIVE
-        ) is False
+    @pytest.mark.parametrize(
+        "current_state,target_state,expected",
+        [
+            (SessionState.ACTIVE, SessionState.ARCHIVED, True),
+            (SessionState.ARCHIVED, SessionState.ACTIVE, True),
+            (SessionState.ACTIVE, SessionState.DELETED, True),
+            (SessionState.ARCHIVED, SessionState.DELETED, True),
+            (SessionState.DELETED, SessionState.ACTIVE, False),
+            (SessionState.DELETED, SessionState.ARCHIVED, False),
+            (SessionState.ACTIVE, SessionState.ACTIVE, False),
+            (SessionState.ARCHIVED, SessionState.ARCHIVED, False),
+            (SessionState.DELETED, SessionState.DELETED, False),
+        ],
+    )
+    def test_can_transition(self, current_state, target_state, expected):
+        """Test the transition table for every (current, target) state pair."""
+        assert SessionLifecycle.can_transition(current_state, target_state) is expected
 
 
 class TestSessionLifecycleSoftDelete:
     """Test SessionLifecycle soft delete (archival)."""
 
-    def test_soft_delete_sets_archived_status(self, db_session):
-        """Test soft delete sets ARCHIVED status."""
+    def test_soft_delete_sets_archived_status_and_timestamp(self, db_session):
+        """Test soft delete sets ARCHIVED status and archived_at."""
         session = SessionFactory.create(db_session, status="ACTIVE")
 
         SessionLifecycle.transition(session, SessionState.ARCHIVED, db_session, None)
         db_session.refresh(session)
 
         assert session.status == "ARCHIVED"
+        assert isinstance(session.archived_at, datetime)
 
-    def test_soft_delete_sets_archived_at(self, db_session):
-        """Test soft delete sets archived_at timestamp."""
-        session = SessionFactory.create(db_session, status="ACTIVE")
-
-        SessionLifecycle.transition(session, SessionState.ARCHIVED, db_session, None)
-        db_session.refresh(session)
+    def test_bulk_archive_only_touches_matching_active_sessions(self, db_session):
+        """Test bulk_archive archives matching ACTIVE sessions and reports the count."""
+        user, _ = UserFactory.create(db_session)
+        matching = SessionFactory.create(db_session, user_id=user.id, status="ACTIVE")
+        excluded = SessionFactory.create(db_session, user_id=user.id, status="ACTIVE")
+        archived = SessionFactory.create(db_session, user_id=user.id, status="ARCHIVED")
 
-        assert session.archived_at is not None
-        assert isinstance(session.archived_at, datetime)
+        count = SessionLifecycle.bulk_archive(
+            db_session, SessionModel.user_id == user.id, SessionModel.id != excluded.id, now=FROZEN_NOW
+        )
 
-    def test_soft_delete_already_archived(self, db_session):
-        """Test soft delete on already archived session."""
-        session = SessionFactory.create(db_session, status="ARCHIVED")
-        
-        # Transitioning to same state should raise error (as per validate_transition)
-        # But wait, transition method checks can_transition.
-        # ARCHIVED -> ARCHIVED is NOT in VALID_TRANSITIONS.
-        # So it should raise ValueError
-        with pytest.raises(ValueError):
-             SessionLifecycle.transition(session, SessionState.ARCHIVED, db_session, None)
+        assert count == 1
+        assert row_exists(db_session, SessionModel, id=matching.id, status="ARCHIVED", archived_at=FROZEN_NOW)
+        assert row_exists(db_session, SessionModel, id=excluded.id, status="ACTIVE")
+        assert row_exists(db_session, SessionModel, id=archived.id, archived_at=None)
 
 
 class TestSessionLifecycleRestore:
     """Test SessionLifecycle restore from archive."""
 
-    def test_restore_sets_active_status(self, db_session):
-        """Test restore sets ACTIVE status."""
+    def test_restore_sets_active_status_and_clears_archived_at(self, db_session):
+        """Test restore sets ACTIVE status and clears archived_at."""
         session = SessionFactory.create(db_session, status="ARCHIVED")
+        session.archived_at = TEN_DAYS_AGO
 
         SessionLifecycle.transition(session, SessionState.ACTIVE, db_session, None)
         db_session.refresh(session)
 
         assert session.status == "ACTIVE"
-
-    def test_restore_clears_archived_at(self, db_session):
-        """Test restore clears archived_at."""
-        session = SessionFactory.create(db_session, status="ARCHIVED")
-
-        SessionLifecycle.transition(session, SessionState.ACTIVE, db_session, None)
-        db_session.refresh(session)
-
         assert session.archived_at is None
 
-    def test_restore_active_session(self, db_session):
-        """Test restore on already active session."""
-        session = SessionFactory.create(db_session, status="ACTIVE")
-
-        # ACTIVE -> ACTIVE is invalid
-        with pytest.raises(ValueError):
-            SessionLifecycle.transition(session, SessionState.ACTIVE, db_session, None)
-
 
 class TestSessionLifecyclePermanentDelete:
     """Test SessionLifecycle permanent delete."""
 
-    def test_permanent_delete_sets_deleted_status(self, db_session):
-        """Test permanent delete sets DELETED status."""
-        session = SessionFactory.create(db_session, status="ACTIVE")
-        mock_vectordb = MagicMock()
-
-        SessionLifecycle.transition(session, SessionState.DELETED, db_session, mock_vectordb)
-        
-        # Session is deleted from DB, so we can't refresh it.
-        # We can check if it exists query
-        deleted_session = db_session.query(SessionModel).filter(SessionModel.id == session.id).first()
-        assert deleted_session is None
-
-    def test_permanent_delete_calls_vector_db_cleanup(self, db_session):
-        """Test permanent delete triggers vector DB cleanup."""
-        session = SessionFactory.create(db_session)
-        mock_vectordb = MagicMock()
+    @pytest.mark.parametrize("start_status", ["ACTIVE", "ARCHIVED"])
+    def test_permanent_delete(self, db_session, mock_vectordb, start_status):
+        """Test permanent delete removes the row and its vector collection."""
+        session = SessionFactory.create(db_session, status=start_status)
+        session_id, user_id = session.id, session.user_id
 
         SessionLifecycle.transition(session, SessionState.DELETED, db_session, mock_vectordb)
 
-        # Verify VectorDBService.delete_session_collection was called
-        mock_vectordb.delete_session_collection.assert_called_with(session.id, session.user_id)
-
-    def test_permanent_delete_from_active(self, db_session):
-        """Test permanent delete from ACTIVE status."""
-        session = SessionFactory.create(db_session, status="ACTIVE")
-        mock_vectordb = MagicMock()
-
-        SessionLifecycle.transition(session, SessionState.DELETED, db_session, mock_vectordb)
-        
-        deleted_session = db_session.query(SessionModel).filter(SessionModel.id == session.id).first()
-        assert deleted_session is None
-
-    def test_permanent_delete_from_archived(self, db_session):
-        """Test permanent delete from ARCHIVED status."""
-        session = SessionFactory.create(db_session, status="ARCHIVED")
-        mock_vectordb = MagicMock()
-
-        SessionLifecycle.transition(session, SessionState.DELETED, db_session, mock_vectordb)
-        
-        deleted_session = db_session.query(SessionModel).filter(SessionModel.id == session.id).first()
-        assert deleted_session is None
+        assert session.status == "DELETED"
+        assert not row_exists(db_session, SessionModel, id=session_id)
+        mock_vectordb.delete_session_collection.assert_called_once_with(session_id, user_id)
 
 
 class TestSessionLifecycleTransition:
@@ -197,14 +138,23 @@ class TestSessionLifecycleTransition:
 
         assert session.status == "ACTIVE"
 
-    def test_transition_invalid_raises_error(self, db_session):
+    @pytest.mark.parametrize(
+        "status,target_state",
+        [
+            ("ARCHIVED", SessionState.ARCHIVED),  # soft delete of an archived session
+            ("ACTIVE", SessionState.ACTIVE),  # restore of an active session
+            ("DELETED", SessionState.ACTIVE),
+        ],
+    )
+    def test_transition_invalid_raises_error(self, db_session, status, target_state):
         """Test that invalid transition raises an error."""
-        session = SessionFactory.create(db_session, status="DELETED")
+        session = SessionFactory.create(db_session, status=status)
 
         with pytest.raises(ValueError):
-            SessionLifecycle.transition(session, SessionState.ACTIVE, db_session, None)
+            SessionLifecycle.transition(session, target_state, db_session, None)
 
 
+@pytest.mark.usefixtures("frozen_now")
 class TestArchivalPolicy:
     """Test ArchivalPolicy auto-archival rules."""
 
@@ -212,7 +162,7 @@ class TestArchivalPolicy:
         """Test inactivity check when threshold not met."""
         session = SessionFactory.create(db_session, status="ACTIVE")
         # Ensure updated_at is recent
-        session.updated_at = datetime.now(timezone.utc)
+        session.updated_at = FROZEN_NOW
         
         should_archive = ArchivalPolicy.should_auto_archive(session)
 
@@ -222,10 +172,7 @@ class TestArchivalPolicy:
         """Test inactivity check when threshold is met."""
         session = SessionFactory.create(db_session, status="ACTIVE")
         # Manually set updated_at to 31 days ago
-        # Note: ArchivalPolicy uses timezone-aware UTC datetime.now()
-        session.updated_at = datetime.now(timezone.utc) - timedelta(days=31)
-        db_session.commit()
-        db_session.refresh(session)
+        session.updated_at = THIRTY_ONE_DAYS_AGO
 
         should_archive = ArchivalPolicy.should_auto_archive(session)
 
@@ -234,7 +181,7 @@ class TestArchivalPolicy:
     def test_check_retention_threshold_not_met(self, db_session):
         """Test retention check when threshold not met."""
         session = SessionFactory.create(db_session, status="ARCHIVED")
-        session.archived_at = datetime.now(timezone.utc) - timedelta(days=10)
+        session.archived_at = TEN_DAYS_AGO
 
         should_delete = ArchivalPolicy.should_hard_delete(session)
 
@@ -244,9 +191,7 @@ class TestArchivalPolicy:
         """Test retention check when threshold is met."""
         session = SessionFactory.create(db_session, status="ARCHIVED")
         # Manually set archived_at to 91 days ago
-        session.archived_at = datetime.now(timezone.utc) - timedelta(days=91)
-        db_session.commit()
-        db_session.refresh(session)
+        session.archived_at = NINETY_ONE_DAYS_AGO
 
         should_delete = ArchivalPolicy.should_hard_delete(session)
 
@@ -255,9 +200,7 @@ class TestArchivalPolicy:
     def test_check_inactivity_archived_session(self, db_session):
         """Test inactivity check ignores archived sessions."""
         session = SessionFactory.create(db_session, status="ARCHIVED")
-        session.updated_at = datetime.now(timezone.utc) - timedelta(days=31)
-        db_session.commit()
-        db_session.refresh(session)
+        session.updated_at = THIRTY_ONE_DAYS_AGO
 
         # Should not archive already archived sessions
         should_archive = ArchivalPolicy.should_auto_archive(session)
@@ -265,40 +208,94 @@ class TestArchivalPolicy:
         assert should_archive is False
 
 
+@pytest.mark.usefixtures("frozen_now")
 class TestArchivalPolicyAutoCleanup:
     """Test ArchivalPolicy automatic cleanup."""
 
-    def test_cleanup_old_sessions(self, db_session):
+    def test_cleanup_old_sessions(self, db_session, mock_vectordb):
         """Test cleanup archiving old inactive sessions."""
         user, _ = UserFactory.create(db_session)
-        mock_vectordb = MagicMock()
         
         # Create active session and old inactive session
-        SessionFactory.create(db_session, user_id=user.id, status="ACTIVE")
+        recent_session = SessionFactory.create(db_session, user_id=user.id, status="ACTIVE")
         
         old_session = SessionFactory.create(db_session, user_id=user.id, status="ACTIVE")
-        old_session.updated_at = datetime.now(timezone.utc) - timedelta(days=31)
+        old_session.updated_at = THIRTY_ONE_DAYS_AGO
         db_session.commit()
 
         ArchivalPolicy.cleanup_job(db_session, mock_vectordb)
 
         db_session.refresh(old_session)
+        db_session.refresh(recent_session)
         assert old_session.status == "ARCHIVED"
+        assert old_session.archived_at.replace(tzinfo=timezone.utc) == FROZEN_NOW
+        assert recent_session.status == "ACTIVE"
 
-    def test_cleanup_respects_retention_policy(self, db_session):
+    def test_cleanup_respects_retention_policy(self, db_session, mock_vectordb):
         """Test cleanup respects retention policy (hard deletes old archived sessions)."""
         user, _ = UserFactory.create(db_session)
-        mock_vectordb = MagicMock()
         
         session = SessionFactory.create(db_session, user_id=user.id, status="ARCHIVED")
-        session.archived_at = datetime.now(timezone.utc) - timedelta(days=91)
+        session.archived_at = NINETY_ONE_DAYS_AGO
+        DocumentFactory.create(db_session, session_id=session.id)
         db_session.commit()
+        session_id, user_id = session.id, session.user_id
 
         ArchivalPolicy.cleanup_job(db_session, mock_vectordb)
 
         # Check if session is deleted
-        deleted_session = db_session.query(SessionModel).filter(SessionModel.id == session.id).first()
-        assert deleted_session is None
-
-
-
+        assert not row_exists(db_session, SessionModel, id=session_id)
+        assert not row_exists(db_session, Document, session_id=session_id)
+        mock_vectordb.delete_session_collection.assert_called_once_with(session_id, user_id)
+
+    def test_cleanup_statement_count_independent_of_batch_size(
+        self, db_session, mock_vectordb, assert_max_queries
+    ):
+        """Test cleanup archives and deletes a large batch with a fixed number of statements."""
+        user, _ = UserFactory.create(db_session)
+        SessionFactory.bulk_create_core(
+            db_session,
+            [{"user_id": user.id, "status": "ACTIVE", "updated_at": THIRTY_ONE_DAYS_AGO}] * 1000,
+        )
+        SessionFactory.bulk_create_core(
+            db_session,
+            [{"user_id": user.id, "status": "ARCHIVED", "archived_at": NINETY_ONE_DAYS_AGO}] * 1000,
+        )
+
+        # UPDATE to archive, DELETE documents, DELETE sessions
+        with assert_max_queries(3):
+            ArchivalPolicy.cleanup_job(db_session, mock_vectordb)
+
+        assert SessionManager.count_sessions(user.id, db_session, status="ARCHIVED") == 1000
+        assert SessionManager.count_sessions(user.id, db_session) == 1000
+        assert mock_vectordb.delete_session_collection.call_count == 1000
+
+    def test_cleanup_skips_session_restored_mid_job(self, db_session, mock_vectordb):
+        """Test a session restored before the delete runs keeps its rows and its collection."""
+        user, _ = UserFactory.create(db_session)
+        expired = SessionFactory.create(db_session, user_id=user.id, status="ARCHIVED")
+        restored = SessionFactory.create(db_session, user_id=user.id, status="ARCHIVED")
+        expired.archived_at = restored.archived_at = NINETY_ONE_DAYS_AGO
+        DocumentFactory.create(db_session, session_id=restored.id)
+        db_session.commit()
+        expired_id, restored_id = expired.id, restored.id
+
+        # Another request restores the session just before the first DELETE runs
+        def restore_first(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith("DELETE FROM documents"):
+                cursor.execute(
+                    "UPDATE sessions SET status = 'ACTIVE', archived_at = NULL WHERE id = ?",
+                    (restored_id,),
+                )
+
+        connection = db_session.connection()
+        event.listen(connection, "before_cursor_execute", restore_first)
+        try:
+            ArchivalPolicy.cleanup_job(db_session, mock_vectordb)
+        finally:
+            event.remove(connection, "before_cursor_execute", restore_first)
+
+        assert not row_exists(db_session, SessionModel, id=expired_id)
+        assert row_exists(db_session, SessionModel, id=restored_id, status="ACTIVE")
+        assert row_exists(db_session, Document, session_id=restored_id)
+        mock_vectordb.delete_session_collection.assert_called_once_with(expired_id, user.id)
@@ -2,15 +2,13 @@
 Additional unit tests for session_lifecycle.py exception handling.
 """
 import pytest
-from unittest.mock import MagicMock
 from session_lifecycle import SessionLifecycle, SessionState
-from tests.fixtures.factories import SessionFactory
+from tests.fixtures.factories import SessionFactory, row_exists
 
-def test_hard_delete_exception_handling(db_session):
+def test_hard_delete_exception_handling(db_session, mock_vectordb):
     """Test _hard_delete handles vector DB errors gracefully."""
     session = SessionFactory.create(db_session, status="DELETED")
-    mock_vector_db = MagicMock()
-    mock_vector_db.delete_session_collection.side_effect = Exception("Chroma Error")
+    mock_vectordb.delete_session_collection.side_effect = Exception("Chroma Error")
     
     # calling transition to DELETED triggers _hard_delete
     # But session is already DELETED? validate_transition checks logic.
@@ -18,7 +16,7 @@ def test_hard_delete_exception_handling(db_session):
     session.status = "ARCHIVED"
     
     # Should not raise exception
-    SessionLifecycle.transition(session, SessionState.DELETED, db_session, mock_vector_db)
+    SessionLifecycle.transition(session, SessionState.DELETED, db_session, mock_vectordb)
     
     # Session is deleted from DB, cannot refresh.
     # Check in-memory status
@@ -26,5 +24,4 @@ def test_hard_delete_exception_handling(db_session):
     
     # Verify it is deleted from DB
     from models import Session as SessionModel
-    deleted = db_session.query(SessionModel).filter_by(id=session.id).first()
-    assert deleted is None
+    assert not row_exists(db_session, SessionModel, id=session.id)
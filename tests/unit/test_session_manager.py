@@ -2,12 +2,43 @@
 Unit tests for sessionManager.py
 """
 import pytest
-from unittest.mock import MagicMock
+import time_machine
 from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
 
 from sessionManager import SessionManager
-from models import Session as SessionModel, Document
-from tests.fixtures.factories import UserFactory, SessionFactory, DocumentFactory
+from models import User, Session as SessionModel, Document
+from tests.fixtures.factories import UserFactory, SessionFactory, DocumentFactory, row_exists
+
+FROZEN_NOW = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture(scope="class")
+def list_dataset(test_db):
+    """Commit one read-only dataset for the listing tests and drop it afterwards.
+
+    ``owner`` has two ACTIVE and one ARCHIVED session, ``other`` has one
+    ACTIVE session and ``empty`` has none. Tests must not modify these rows.
+    """
+    with Session(test_db) as s:
+        owner, _ = UserFactory.create(s)
+        other, _ = UserFactory.create(s)
+        empty, _ = UserFactory.create(s)
+        SessionFactory.create_batch(s, 2, user_id=owner.id, status="ACTIVE")
+        SessionFactory.create(s, user_id=owner.id, status="ARCHIVED")
+        SessionFactory.create(s, user_id=other.id, status="ACTIVE")
+        dataset = SimpleNamespace(owner_id=owner.id, other_id=other.id, empty_id=empty.id)
+        s.commit()
+
+    yield dataset
+
+    with Session(test_db) as s:
+        # Session rows go with their users through ON DELETE CASCADE
+        s.execute(delete(User).where(User.id.in_(vars(dataset).values())))
+        s.commit()
 
 
 class TestSessionManagerCreate:
@@ -80,61 +111,61 @@ class TestSessionManagerRetrieve:
 class TestSessionManagerList:
     """Test SessionManager.list_user_sessions."""
 
-    def test_list_all_sessions(self, db_session):
+    def test_list_all_sessions(self, db_session, list_dataset, assert_max_queries):
         """Test listing all sessions for a user."""
-        user, _ = UserFactory.create(db_session)
-        sessions = [SessionFactory.create(db_session, user_id=user.id) for _ in range(3)]
-
-        sessions = SessionManager.list_user_sessions(user.id, db_session)
+        with assert_max_queries(1):
+            sessions = SessionManager.list_user_sessions(list_dataset.owner_id, db_session)
 
         assert len(sessions) == 3
 
-    def test_list_sessions_filter_by_status(self, db_session):
-        """Test listing sessions filtered by status."""
-        user, _ = UserFactory.create(db_session)
-        SessionFactory.create(db_session, user_id=user.id, status="ACTIVE")
-        SessionFactory.create(db_session, user_id=user.id, status="ACTIVE")
-        SessionFactory.create(db_session, user_id=user.id, status="ARCHIVED")
-
-        active_sessions = SessionManager.list_user_sessions(
-            user.id, db_session, status="ACTIVE"
-        )
+    def test_list_sessions_filter_by_status(self, db_session, list_dataset, count_queries):
+        """Test listing sessions filtered by status in SQL."""
+        with count_queries() as statements:
+            active_sessions = SessionManager.list_user_sessions(
+                list_dataset.owner_id, db_session, status="ACTIVE"
+            )
 
+        # The ARCHIVED row is excluded by the WHERE clause, not in Python
+        assert len(statements) == 1
+        assert "sessions.status = ?" in statements[0]
         assert len(active_sessions) == 2
         assert all(s.status == "ACTIVE" for s in active_sessions)
 
-    def test_list_sessions_empty(self, db_session):
-        """Test listing sessions when user has none."""
-        user, _ = UserFactory.create(db_session)
+    def test_count_sessions_filter_by_status(self, db_session, list_dataset):
+        """Test counting sessions with and without a status filter."""
+        assert SessionManager.count_sessions(list_dataset.owner_id, db_session) == 3
+        assert SessionManager.count_sessions(
+            list_dataset.owner_id, db_session, status="ACTIVE"
+        ) == 2
 
-        sessions = SessionManager.list_user_sessions(user.id, db_session)
+    def test_list_sessions_empty(self, db_session, list_dataset):
+        """Test listing sessions when user has none."""
+        sessions = SessionManager.list_user_sessions(list_dataset.empty_id, db_session)
 
         assert len(sessions) == 0
 
-    def test_list_sessions_different_users(self, db_session):
+    def test_list_sessions_different_users(self, db_session, list_dataset):
         """Test that sessions are isolated per user."""
-        user1, _ = UserFactory.create(db_session)
-        user2, _ = UserFactory.create(db_session)
+        owner_sessions = SessionManager.list_user_sessions(list_dataset.owner_id, db_session)
+        other_sessions = SessionManager.list_user_sessions(list_dataset.other_id, db_session)
 
-        SessionFactory.create(db_session, user_id=user1.id)
-        SessionFactory.create(db_session, user_id=user2.id)
-
-        user1_sessions = SessionManager.list_user_sessions(user1.id, db_session)
-        user2_sessions = SessionManager.list_user_sessions(user2.id, db_session)
-
-        assert len(user1_sessions) == 1
-        assert len(user2_sessions) == 1
+        assert {s.user_id for s in owner_sessions} == {list_dataset.owner_id}
+        assert [s.user_id for s in other_sessions] == [list_dataset.other_id]
 
 
 class TestSessionManagerDocuments:
     """Test SessionManager document operations."""
 
-    def test_get_session_documents(self, db_session):
+    def test_get_session_documents(self, db_session, assert_max_queries):
         """Test getting documents in a session."""
         session = SessionFactory.create(db_session)
-        documents = [DocumentFactory.create(db_session, session_id=session.id) for _ in range(3)]
+        session_id, user_id = session.id, session.user_id
+        DocumentFactory.create_batch(db_session, session_id=session_id, count=3)
+        db_session.expire_all()
 
-        documents = SessionManager.get_session_documents(session.id, session.user_id, db_session)
+        # Ownership lookup plus one SELECT for all documents
+        with assert_max_queries(2):
+            documents = SessionManager.get_session_documents(session_id, user_id, db_session)
 
         assert len(documents) == 3
 
@@ -173,16 +204,24 @@ class TestSessionManagerActivity:
     def test_track_session_activity(self, db_session):
         """Test tracking session activity updates timestamp."""
         session = SessionFactory.create(db_session)
-        old_updated_at = session.updated_at
 
-        # Ensure some time passes or simulate it
-        # Since implementation uses datetime.now(timezone.utc), it might be same if too fast.
-        # But usually execution takes time.
-        
-        SessionManager.update_session_timestamp(session.id, session.user_id, db_session)
+        with time_machine.travel(FROZEN_NOW, tick=False):
+            SessionManager.update_session_timestamp(session.id, session.user_id, db_session)
+        db_session.refresh(session)
+
+        assert session.updated_at.replace(tzinfo=timezone.utc) == FROZEN_NOW
+
+    def test_track_session_activity_wrong_user(self, db_session):
+        """Test tracking activity is a no-op for a user who does not own the session."""
+        session = SessionFactory.create(db_session)
+        other_user, _ = UserFactory.create(db_session)
+        original = session.updated_at
+
+        with time_machine.travel(FROZEN_NOW, tick=False):
+            SessionManager.update_session_timestamp(session.id, other_user.id, db_session)
         db_session.refresh(session)
 
-        assert session.updated_at >= old_updated_at
+        assert session.updated_at.replace(tzinfo=timezone.utc) == original
 
 
 class TestSessionManagerDelete:
@@ -208,31 +247,30 @@ class TestSessionManagerDelete:
         assert session.status == "ACTIVE"
         assert session.archived_at is None
 
-    def test_hard_delete_session(self, db_session):
+    def test_hard_delete_session(self, db_session, mock_vectordb):
         """Test hard deleting (permanent) a session."""
         session = SessionFactory.create(db_session)
         session_id = session.id
         user_id = session.user_id
-        mock_vectordb = MagicMock()
 
         SessionManager.delete_session(session_id, user_id, db_session, mock_vectordb)
 
         # Direct query to verify deletion
-        deleted = db_session.query(SessionModel).filter(SessionModel.id == session_id).first()
-        assert deleted is None
+        assert not row_exists(db_session, SessionModel, id=session_id)
 
-    def test_hard_delete_also_deletes_documents(self, db_session):
+    def test_hard_delete_also_deletes_documents(
+        self, db_session, mock_vectordb, assert_max_queries
+    ):
         """Test hard delete also removes associated documents."""
         session = SessionFactory.create(db_session)
-        documents = [DocumentFactory.create(db_session, session_id=session.id) for _ in range(2)]
-        mock_vectordb = MagicMock()
+        session_id = session.id
+        DocumentFactory.create_batch(db_session, session_id=session_id, count=5)
 
-        SessionManager.delete_session(session.id, session.user_id, db_session, mock_vectordb)
+        # One DELETE for the documents and one for the session, whatever the count
+        with assert_max_queries(2):
+            SessionManager.delete_session(session_id, session.user_id, db_session, mock_vectordb)
 
-        documents = db_session.query(Document).filter(
-            Document.session_id == session.id
-        ).all()
-        assert len(documents) == 0
+        assert not row_exists(db_session, Document, session_id=session_id)
 
 
 class TestSessionManagerEdgeCases:
@@ -247,22 +285,26 @@ class TestSessionManagerEdgeCases:
     def test_list_sessions_with_many_records(self, db_session):
         """Test listing sessions with many records."""
         user, _ = UserFactory.create(db_session)
-        sessions = [SessionFactory.create(db_session, user_id=user.id) for _ in range(100)]
-
-        sessions = SessionManager.list_user_sessions(user.id, db_session, limit=200)
+        SessionFactory.bulk_create_core(
+            db_session, [{"user_id": user.id, "title": "Test Session"}] * 100
+        )
 
-        assert len(sessions) == 100
+        assert SessionManager.count_sessions(user.id, db_session) == 100
+        # Only the limited page is materialized as ORM objects
+        sessions = SessionManager.list_user_sessions(user.id, db_session, limit=25)
+        assert len(sessions) == 25
 
     def test_track_activity_multiple_times(self, db_session):
         """Test tracking activity multiple times."""
         session = SessionFactory.create(db_session)
+        later = datetime(2024, 1, 2, tzinfo=timezone.utc)
 
-        SessionManager.update_session_timestamp(session.id, session.user_id, db_session)
-        db_session.refresh(session)
-        first_update = session.updated_at
-
-        SessionManager.update_session_timestamp(session.id, session.user_id, db_session)
-        db_session.refresh(session)
-        second_update = session.updated_at
+        with time_machine.travel(FROZEN_NOW, tick=False) as traveller:
+            SessionManager.update_session_timestamp(session.id, session.user_id, db_session)
+            db_session.refresh(session)
+            assert session.updated_at.replace(tzinfo=timezone.utc) == FROZEN_NOW
 
-        assert second_update >= first_update
+            traveller.move_to(later)
+            SessionManager.update_session_timestamp(session.id, session.user_id, db_session)
+            db_session.refresh(session)
+            assert session.updated_at.replace(tzinfo=timezone.utc) == later
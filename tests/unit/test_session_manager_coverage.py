@@ -12,7 +12,7 @@ class TestSessionManagerCoverage:
     def test_create_session_user_not_found(self):
         """Test creating session for non-existent user raises ValueError."""
         mock_db = MagicMock()
-        mock_db.query.return_value.filter.return_value.first.return_value = None
+        mock_db.get.return_value = None
         
         with pytest.raises(ValueError, match="User non_existent not found"):
             SessionManager.create_session("non_existent", mock_db)
@@ -21,7 +21,7 @@ class TestSessionManagerCoverage:
         """Test getting documents returns empty list if session not found."""
         mock_db = MagicMock()
         # Mock get_session returning None
-        mock_db.query.return_value.filter.return_value.first.return_value = None
+        mock_db.get.return_value = None
         
         docs = SessionManager.get_session_documents("sess1", "user1", mock_db)
         assert docs == []
@@ -29,38 +29,24 @@ class TestSessionManagerCoverage:
     def test_add_document_to_session_not_found(self):
         """Test adding document to non-existent session raises ValueError."""
         mock_db = MagicMock()
-        mock_db.query.return_value.filter.return_value.first.return_value = None
+        mock_db.get.return_value = None
         
         with pytest.raises(ValueError, match="not found"):
             SessionManager.add_document_to_session("sess1", "user1", "file.pdf", 100, "pdf", 1, mock_db)
 
-    def test_archive_session_lifecycle_error(self):
-        """Test error logging when archive transition fails."""
+    @pytest.mark.parametrize(
+        "method,extra_args",
+        [
+            ("archive_session", ()),
+            ("reactivate_session", ()),
+            ("delete_session", (MagicMock(),)),
+        ],
+    )
+    def test_lifecycle_error(self, method, extra_args):
+        """Test a failing transition is logged and re-raised."""
         mock_db = MagicMock()
-        mock_session = MagicMock(spec=Session)
-        mock_db.query.return_value.filter.return_value.first.return_value = mock_session
-        
-        with patch("sessionManager.SessionLifecycle.transition", side_effect=ValueError("Invalid state")):
-             with pytest.raises(ValueError, match="Invalid state"):
-                 SessionManager.archive_session("sess1", "user1", mock_db)
-
-    def test_reactivate_session_lifecycle_error(self):
-        """Test error logging when reactivate transition fails."""
-        mock_db = MagicMock()
-        mock_session = MagicMock(spec=Session)
-        mock_db.query.return_value.filter.return_value.first.return_value = mock_session
-        
-        with patch("sessionManager.SessionLifecycle.transition", side_effect=ValueError("Invalid state")):
-             with pytest.raises(ValueError, match="Invalid state"):
-                 SessionManager.reactivate_session("sess1", "user1", mock_db)
+        mock_db.get.return_value = MagicMock(spec=Session, user_id="user1")
 
-    def test_delete_session_lifecycle_error(self):
-        """Test error logging when delete transition fails."""
-        mock_db = MagicMock()
-        mock_session = MagicMock(spec=Session)
-        mock_db.query.return_value.filter.return_value.first.return_value = mock_session
-        mock_vector_service = MagicMock()
-        
         with patch("sessionManager.SessionLifecycle.transition", side_effect=ValueError("Invalid state")):
-             with pytest.raises(ValueError, match="Invalid state"):
-                 SessionManager.delete_session("sess1", "user1", mock_db, mock_vector_service)
+            with pytest.raises(ValueError, match="Invalid state"):
+                getattr(SessionManager, method)("sess1", "user1", mock_db, *extra_args)
@@ -5,9 +5,20 @@ import pytest
 from unittest.mock import patch, MagicMock, AsyncMock
 from io import BytesIO
 
+import vectorDB
 from vectorDB import VectorDBService
 
 
+@pytest.fixture(autouse=True)
+def clear_collection_cache():
+    """Keep cached collection handles and the shared client from leaking between tests."""
+    vectorDB._collection_cache.clear()
+    vectorDB._client = None
+    yield
+    vectorDB._collection_cache.clear()
+    vectorDB._client = None
+
+
 class TestVectorDBServiceCollectionName:
     """Test vector DB collection name generation."""
 
@@ -24,24 +35,21 @@ class TestVectorDBServiceCollectionName:
         assert "user" in name
         assert "session" in name
 
-    def test_collection_name_uniqueness(self):
-        """Test collection names are unique per session."""
-        user_id = "user-123"
-
-        name1 = VectorDBService.get_collection_name("session-1", user_id)
-        name2 = VectorDBService.get_collection_name("session-2", user_id)
+    @pytest.mark.parametrize(
+        "first,second,same",
+        [
+            (("session-456", "user-123"), ("session-456", "user-123"), True),
+            (("session-1", "user-123"), ("session-2", "user-123"), False),
+            (("session-456", "user-1"), ("session-456", "user-2"), False),
+        ],
+        ids=["deterministic", "per-session", "per-user"],
+    )
+    def test_collection_name_isolation(self, first, second, same):
+        """Test names are stable for a (session, user) pair and distinct across pairs."""
+        name1 = VectorDBService.get_collection_name(*first)
+        name2 = VectorDBService.get_collection_name(*second)
 
-        assert name1 != name2
-
-    def test_collection_name_deterministic(self):
-        """Test collection names are deterministic."""
-        user_id = "user-123"
-        session_id = "session-456"
-
-        name1 = VectorDBService.get_collection_name(session_id, user_id)
-        name2 = VectorDBService.get_collection_name(session_id, user_id)
-
-        assert name1 == name2
+        assert (name1 == name2) is same
 
 
 class TestVectorDBServiceCollectionCreation:
@@ -66,6 +74,46 @@ class TestVectorDBServiceCollectionCreation:
         assert "embedding_function" in kwargs
         assert kwargs["embedding_function"] == mock_embedding
 
+    @patch("vectorDB.Chroma")
+    def test_collection_handle_is_reused(self, mock_chroma):
+        """Test a session's collection is opened once and then served from cache."""
+        mock_chroma.side_effect = lambda **kwargs: MagicMock()
+
+        first = VectorDBService.create_session_collection("user-1", "session-1", MagicMock())
+        second = VectorDBService.create_session_collection("user-1", "session-1", MagicMock())
+        other = VectorDBService.create_session_collection("user-1", "session-2", MagicMock())
+
+        assert first is second
+        assert other is not first
+        assert mock_chroma.call_count == 2
+
+    @patch("vectorDB.COLLECTION_CACHE_SIZE", 2)
+    @patch("vectorDB.Chroma")
+    def test_collection_cache_evicts_least_recently_used(self, mock_chroma):
+        """Test the cache drops the least recently used handle when full."""
+        mock_chroma.side_effect = lambda **kwargs: MagicMock()
+
+        for session_id in ("session-1", "session-2", "session-1", "session-3"):
+            VectorDBService.create_session_collection("user-1", session_id, MagicMock())
+
+        assert list(vectorDB._collection_cache) == [
+            ("user-1", "session-1"),
+            ("user-1", "session-3"),
+        ]
+
+    @patch("vectorDB.chromadb.PersistentClient")
+    @patch("vectorDB.Chroma")
+    def test_delete_invalidates_cached_handle(self, mock_chroma, mock_client_cls):
+        """Test deleting a collection forces the next access to reopen it."""
+        mock_chroma.side_effect = lambda **kwargs: MagicMock()
+
+        first = VectorDBService.create_session_collection("user-1", "session-1", MagicMock())
+        VectorDBService.delete_session_collection("session-1", "user-1")
+        second = VectorDBService.create_session_collection("user-1", "session-1", MagicMock())
+
+        assert first is not second
+        assert mock_chroma.call_count == 2
+
 
 class TestVectorDBServiceDocumentProcessing:
     """Test document processing and embedding."""
@@ -93,10 +141,36 @@ class TestVectorDBServiceDocumentProcessing:
 
         assert result["chunks_added"] == 2
         assert result["file_name"] == file_name
-        mock_vectordb.add_documents.assert_called_once()
+        mock_vectordb.add_texts.assert_called_once()
+        kwargs = mock_vectordb.add_texts.call_args.kwargs
+        assert kwargs["texts"] == ["Chunk 1", "Chunk 2"]
+        assert [m["chunk_index"] for m in kwargs["metadatas"]] == [0, 1]
+        assert {m["source_file"] for m in kwargs["metadatas"]} == {file_name}
         mock_process.assert_called_with(file_path)
         mock_split.assert_called_with("Test content")
 
+    @patch("vectorDB.ADD_BATCH_SIZE", 2)
+    @patch("vectorDB.VectorDBService.create_session_collection")
+    @patch("vectorDB.dataSource.splitTextIntoChunks")
+    @patch("vectorDB.dataSource.processFile")
+    def test_add_documents_in_batches(self, mock_process, mock_split, mock_create):
+        """Test chunks are added in batches no larger than ADD_BATCH_SIZE."""
+        mock_vectordb = MagicMock()
+        mock_create.return_value = mock_vectordb
+        mock_process.return_value = "Test content"
+        mock_split.return_value = ["Chunk 1", "Chunk 2", "Chunk 3"]
+
+        result = VectorDBService.add_documents_to_session(
+            "session-456", "user-123", "/tmp/test.pdf", "test.pdf", MagicMock()
+        )
+
+        assert result["chunks_added"] == 3
+        batches = [c.kwargs["ids"] for c in mock_vectordb.add_texts.call_args_list]
+        assert batches == [
+            ["test.pdf_chunk_0", "test.pdf_chunk_1"],
+            ["test.pdf_chunk_2"],
+        ]
+
     @patch("vectorDB.VectorDBService.create_session_collection")
     def test_get_session_retriever(self, mock_create):
         """Test getting retriever for session."""
@@ -145,40 +219,14 @@ class TestVectorDBServiceCleanup:
         # Should handle gracefully (no raise)
         VectorDBService.delete_session_collection(session_id, user_id)
 
+    @patch("vectorDB.chromadb.PersistentClient")
+    def test_delete_reuses_client(self, mock_client_cls):
+        """Test repeated deletes share one Chroma client."""
+        VectorDBService.delete_session_collection("session-1", "user-1")
+        VectorDBService.delete_session_collection("session-2", "user-1")
 
-class TestVectorDBServiceSessionIsolation:
-    """Test session isolation in vector DB."""
-
-    def test_different_sessions_different_collections(self):
-        """Test different sessions have different collections."""
-        user_id = "user-123"
-
-        name1 = VectorDBService.get_collection_name("session-1", user_id)
-        name2 = VectorDBService.get_collection_name("session-2", user_id)
-
-        assert name1 != name2
-
-    def test_same_session_same_collection(self):
-        """Test same session always gets same collection name."""
-        user_id = "user-123"
-        session_id = "session-456"
-
-        name1 = VectorDBService.get_collection_name(session_id, user_id)
-        name2 = VectorDBService.get_collection_name(session_id, user_id)
-
-        assert name1 == name2
-
-    def test_different_users_different_collections(self):
-        """Test different users have different collections."""
-        session_id = "session-456"
-
-        name1 = VectorDBService.get_collection_name(session_id, "user-1")
-        name2 = VectorDBService.get_collection_name(session_id, "user-2")
-
-        assert name1 != name2
-
-
-
+        mock_client_cls.assert_called_once()
+        assert mock_client_cls.return_value.delete_collection.call_count == 2
 
 
 class TestVectorDBServiceEdgeCases:
@@ -5,13 +5,16 @@ from langgraph.checkpoint.sqlite import SqliteSaver
 
 logger = logging.getLogger(__name__)
 
-def extract_message_content(msg) -> dict:
-    if hasattr(msg, "content"):
-        content = msg.content
-    else:
-        content = str(msg)
+# Message class name -> role; names not listed are classified once by
+# _classify_role and remembered here
+_ROLE_BY_TYPE = {
+    "HumanMessage": "user",
+    "AIMessage": "assistant",
+    "SystemMessage": "system",
+    "ToolMessage": "tool",
+}
 
-    msg_type = msg.__class__.__name__
+def _classify_role(msg_type: str) -> str:
     role = "assistant"
     if "Human" in msg_type or "User" in msg_type:
         role = "user"
@@ -21,67 +24,79 @@ def extract_message_content(msg) -> dict:
         role = "system"
     elif "Tool" in msg_type:
         role = "tool"
+    _ROLE_BY_TYPE[msg_type] = role
+    return role
+
+def extract_message_content(msg) -> dict:
+    if hasattr(msg, "content"):
+        content = msg.content
+    else:
+        content = str(msg)
+
+    msg_type = msg.__class__.__name__
+    role = _ROLE_BY_TYPE.get(msg_type) or _classify_role(msg_type)
 
     return {"role": role, "content": content, "type": msg_type}
 
 def get_session_conversation(session_id: str, checkpointer: Any = None, limit: Optional[int] = None) -> dict:
-    local_checkpointer = False
+    checkpointer_manager = None
     try:
         if not checkpointer:
             # Fallback if checkpointer not provided
             memory_db = os.getenv("AGENT_MEMORY_DB", "agent_memory.db")
-            checkpointer = SqliteSaver.from_conn_string(memory_db)
-            checkpointer.__enter__()
-            local_checkpointer = True
+            checkpointer_manager = SqliteSaver.from_conn_string(memory_db)
+            checkpointer = checkpointer_manager.__enter__()
 
         config = {"configurable": {"thread_id": session_id}}
-        all_checkpoints = list(checkpointer.list(config, limit=None))
-
-        if not all_checkpoints:
-            return {"session_id": session_id, "messages": [], "checkpoint_count": 0, "message_count": 0}
 
-        all_messages = []
-        seen_message_ids = set()
+        # checkpointer.list yields newest first; walk it without materialising
+        # every checkpoint and let older sightings of a message overwrite newer
+        # ones, so each message keeps the oldest checkpoint it appeared in
+        first_seen = {}
+        checkpoint_count = 0
 
-        for checkpoint_tuple in reversed(all_checkpoints):
+        for position, checkpoint_tuple in enumerate(checkpointer.list(config, limit=None)):
+            checkpoint_count += 1
             checkpoint = checkpoint_tuple.checkpoint
-            # metadata = checkpoint_tuple.metadata (if needed)
-            
-            # checkpoint['id'] might be available directly in the dict
-            checkpoint_id = checkpoint['id'] 
+            checkpoint_id = checkpoint['id']
             state = checkpoint.get("channel_values", {})
             messages = state.get("messages", [])
 
             for msg_idx, msg in enumerate(messages):
-                # Use message ID if available, otherwise fallback to content hash or checkpoint index
-                if hasattr(msg, "id") and msg.id:
-                    msg_unique_id = msg.id
-                else:
-                    # Fallback for messages without ID (less reliable but better than nothing)
-                    msg_unique_id = f"{checkpoint_id}_{msg_idx}"
-                
-                if msg_unique_id not in seen_message_ids:
-                    msg_data = extract_message_content(msg)
-                    msg_data["id"] = msg_unique_id
-                    msg_data["checkpoint_id"] = checkpoint_id
-                    msg_data["timestamp"] = checkpoint.get("ts")
-                    all_messages.append(msg_data)
-                    seen_message_ids.add(msg_unique_id)
+                # Use message ID if available, otherwise fall back to its checkpoint position
+                # (less reliable but better than nothing)
+                msg_unique_id = getattr(msg, "id", None) or (checkpoint_id, msg_idx)
+                first_seen[msg_unique_id] = (position, msg_idx, checkpoint_id, checkpoint.get("ts"), msg)
+
+        if not checkpoint_count:
+            return {"session_id": session_id, "messages": [], "checkpoint_count": 0, "message_count": 0}
 
+        # Oldest checkpoint first, then position within it
+        ordered = sorted(first_seen.items(), key=lambda item: (-item[1][0], item[1][1]))
         if limit:
-            all_messages = all_messages[-limit:]
+            ordered = ordered[-limit:]
+
+        all_messages = []
+        for msg_unique_id, (_, msg_idx, checkpoint_id, ts, msg) in ordered:
+            msg_data = extract_message_content(msg)
+            if isinstance(msg_unique_id, tuple):
+                msg_data["id"] = f"{checkpoint_id}_{msg_idx}"
+            else:
+                msg_data["id"] = msg_unique_id
+            msg_data["checkpoint_id"] = checkpoint_id
+            msg_data["timestamp"] = ts
+            all_messages.append(msg_data)
 
         logger.info(f"Retrieved {len(all_messages)} messages from session {session_id}")
-        return {"session_id": session_id, "messages": all_messages, "checkpoint_count": len(all_checkpoints), "message_count": len(all_messages)}
+        return {"session_id": session_id, "messages": all_messages, "checkpoint_count": checkpoint_count, "message_count": len(all_messages)}
 
     except Exception as e:
         logger.error(f"Error retrieving conversation history: {e}")
         return {"session_id": session_id, "messages": [], "checkpoint_count": 0, "message_count": 0, "error": str(e)}
     finally:
-        if local_checkpointer and checkpointer:
+        if checkpointer_manager is not None:
             # We created it, so we should close it.
-            # SqliteSaver context manager returns self.
             try:
-                checkpointer.__exit__(None, None, None)
+                checkpointer_manager.__exit__(None, None, None)
             except Exception as e:
                 logger.warning(f"Error closing temporary checkpointer: {e}")
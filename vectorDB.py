@@ -1,16 +1,37 @@
 """Vector database service with session isolation for multi-tenant, multi-session architecture."""
 
 from langchain_chroma import Chroma
-from langchain_core.documents import Document
+from collections import OrderedDict
 from datetime import datetime
 import dataSource
 import chromadb
 import logging
 import os
+import threading
 
 logger = logging.getLogger(__name__)
 
 CHROMA_PATH = os.getenv("CHROMA_PATH", "./chroma_db")
+# Chunks per add_texts call; each call embeds its slice in one request
+# and must stay under Chroma's max batch size (5461 for the default client)
+ADD_BATCH_SIZE = max(1, int(os.getenv("CHROMA_ADD_BATCH_SIZE", 5000)))
+# Open collection handles, most recently used last; every chat turn and
+# upload would otherwise re-open the session's collection from disk
+COLLECTION_CACHE_SIZE = 128
+_collection_cache: "OrderedDict[tuple[str, str], Chroma]" = OrderedDict()
+_collection_cache_lock = threading.Lock()
+# Shared client for collection management; opened on first use
+_client = None
+_client_lock = threading.Lock()
+
+
+def _get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = chromadb.PersistentClient(path=CHROMA_PATH)
+    return _client
 
 
 class VectorDBService:
@@ -27,6 +48,13 @@ class VectorDBService:
         user_id: str, session_id: str, embedding_function
     ) -> Chroma:
 
+        key = (user_id, session_id)
+        with _collection_cache_lock:
+            vectordb = _collection_cache.get(key)
+            if vectordb is not None:
+                _collection_cache.move_to_end(key)
+                return vectordb
+
         collection_name = VectorDBService.get_collection_name(session_id, user_id)
 
         vectordb = Chroma(
@@ -35,6 +63,12 @@ class VectorDBService:
             persist_directory=CHROMA_PATH,
         )
         logger.info(f"Created/loaded collection: {collection_name}")
+
+        with _collection_cache_lock:
+            _collection_cache[key] = vectordb
+            _collection_cache.move_to_end(key)
+            if len(_collection_cache) > COLLECTION_CACHE_SIZE:
+                _collection_cache.popitem(last=False)
         return vectordb
 
     @staticmethod
@@ -42,9 +76,11 @@ class VectorDBService:
 
         collection_name = VectorDBService.get_collection_name(session_id, user_id)
 
+        with _collection_cache_lock:
+            _collection_cache.pop((user_id, session_id), None)
+
         try:
-            client = chromadb.PersistentClient(path=CHROMA_PATH)
-            client.delete_collection(name=collection_name)
+            _get_client().delete_collection(name=collection_name)
             logger.info(f"Deleted collection: {collection_name}")
         except Exception as e:
             logger.warning(f"Error deleting collection {collection_name}: {e}")
@@ -67,30 +103,35 @@ class VectorDBService:
         text = dataSource.processFile(file_path)
         chunks = dataSource.splitTextIntoChunks(text)
 
-        # Include metadata for tracking
-        docs = [
-            Document(
-                page_content=chunk,
-                metadata={
-                    "source_file": file_name,
-                    "chunk_index": i,
-                    "uploaded_at": datetime.now().isoformat(),
-                },
-            )
-            for i, chunk in enumerate(chunks)
+        # Include metadata for tracking; add_texts takes parallel lists, so no
+        # Document objects are built just to be unpacked again
+        uploaded_at = datetime.now().isoformat()
+        metadatas = [
+            {
+                "source_file": file_name,
+                "chunk_index": i,
+                "uploaded_at": uploaded_at,
+            }
+            for i in range(len(chunks))
         ]
 
         # Generate unique document IDs with file context
-        doc_ids = [f"{file_name}_chunk_{i}" for i in range(len(docs))]
-        
-        vectordb.add_documents(documents=docs, ids=doc_ids)
+        doc_ids = [f"{file_name}_chunk_{i}" for i in range(len(chunks))]
+
+        for start in range(0, len(chunks), ADD_BATCH_SIZE):
+            end = start + ADD_BATCH_SIZE
+            vectordb.add_texts(
+                texts=chunks[start:end],
+                metadatas=metadatas[start:end],
+                ids=doc_ids[start:end],
+            )
         logger.info(
-            f"Added {len(docs)} chunks from {file_name} to session {session_id}"
+            f"Added {len(chunks)} chunks from {file_name} to session {session_id}"
         )
 
         return {
             "file_name": file_name,
-            "chunks_added": len(docs),
+            "chunks_added": len(chunks),
             "collection": VectorDBService.get_collection_name(session_id, user_id),
         }
 